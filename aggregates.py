@@ -0,0 +1,141 @@
+# -----------------------------
+# Incremental Market Aggregates
+# -----------------------------
+from models import Trader, Position
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+import threading
+
+
+@dataclass(slots=True)
+class CoinStats:
+    longs: int = 0
+    shorts: int = 0
+    long_notional: float = 0.0
+    short_notional: float = 0.0
+
+    @property
+    def count(self) -> int:
+        return self.longs + self.shorts
+
+    @property
+    def notional(self) -> float:
+        return self.long_notional + self.short_notional
+
+    def long_ratio(self, weighted: bool = False) -> Optional[float]:
+        """Share of longs 0..1 by position count, or by notional when weighted."""
+        total = self.notional if weighted else self.count
+        if not total:
+            return None
+        return (self.long_notional if weighted else self.longs) / total
+
+
+class MarketAggregates:
+    """
+    Long/short counts and notional per coin plus BTC vs altcoin volume over
+    every tracked trader. Each (trader, coin) keeps the contribution it last
+    added, so a position change only subtracts the old one and adds the new
+    one: O(coins of that trader) per update, O(1) or O(coins) per query.
+    WAIT positions (is_long None) and empty positions contribute nothing.
+    With a PositionTable, the notionals in snapshot() and top_coins() are the
+    table's marked values per coin instead of the ones seen at the last sync.
+    version increases on every change and can key caches of rendered output.
+    """
+    def __init__(self, table=None):
+        self.table = table
+        self.coins: Dict[str, CoinStats] = {}
+        self.total = CoinStats()
+        self.btc_volume = 0.0
+        self.alt_volume = 0.0
+        self.version = 0
+        self._contrib: Dict[str, Dict[str, Tuple[bool, float]]] = {}  # address -> coin -> (is_long, notional)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def contribution(pos: Optional[Position]) -> Optional[Tuple[bool, float]]:
+        if pos is None or pos.is_long is None or not pos.size:
+            return None
+        return bool(pos.is_long), abs(pos.position_value)
+
+    def _apply(self, coin: str, contrib: Tuple[bool, float], sign: int):
+        is_long, notional = contrib
+        stats = self.coins.get(coin)
+        if stats is None:
+            stats = self.coins[coin] = CoinStats()
+        for s in (stats, self.total):
+            if is_long:
+                s.longs += sign
+                s.long_notional += sign * notional
+            else:
+                s.shorts += sign
+                s.short_notional += sign * notional
+        if coin == "BTC":
+            self.btc_volume += sign * notional
+        else:
+            self.alt_volume += sign * notional
+        if stats.count == 0:
+            del self.coins[coin]
+        if self.total.count == 0:
+            # drop float residue of the running sums
+            self.total = CoinStats()
+            self.btc_volume = self.alt_volume = 0.0
+
+    def _set(self, address: str, coin: str, contrib: Optional[Tuple[bool, float]]) -> bool:
+        book = self._contrib.setdefault(address, {})
+        old = book.get(coin)
+        if old == contrib:
+            return False
+        if old is not None:
+            self._apply(coin, old, -1)
+            del book[coin]
+        if contrib is not None:
+            self._apply(coin, contrib, 1)
+            book[coin] = contrib
+        return True
+
+    def sync_trader(self, trader: Trader):
+        """Bring the contributions of one trader in line with trader.positions."""
+        with self._lock:
+            changed = False
+            old_coins = list(self._contrib.get(trader.address, ()))
+            for coin, pos in list(trader.positions.items()):
+                changed |= self._set(trader.address, coin, self.contribution(pos))
+            for coin in old_coins:
+                if coin not in trader.positions:
+                    changed |= self._set(trader.address, coin, None)
+            if changed:
+                self.version += 1
+
+    def retain(self, addresses: Iterable[str]):
+        keep = set(addresses)
+        with self._lock:
+            for address in [a for a in self._contrib if a not in keep]:
+                for coin in list(self._contrib[address]):
+                    self._set(address, coin, None)
+                del self._contrib[address]
+                self.version += 1
+
+    def snapshot(self) -> Tuple[int, Dict[str, CoinStats], CoinStats, float, float]:
+        """(version, per-coin copies, totals, btc volume, alt volume) taken under the lock."""
+        with self._lock:
+            coins = {c: CoinStats(s.longs, s.shorts, s.long_notional, s.short_notional) for c, s in self.coins.items()}
+            total = CoinStats(self.total.longs, self.total.shorts, self.total.long_notional, self.total.short_notional)
+            version, btc_volume, alt_volume = self.version, self.btc_volume, self.alt_volume
+        if self.table is not None:
+            # both counters only grow, so their sum changes whenever either does
+            table_version, marks = self.table.coin_notional()
+            version += table_version
+            total.long_notional = total.short_notional = btc_volume = alt_volume = 0.0
+            for coin, stats in coins.items():
+                stats.long_notional, stats.short_notional = marks.get(coin, (0.0, 0.0))
+                total.long_notional += stats.long_notional
+                total.short_notional += stats.short_notional
+                if coin == "BTC":
+                    btc_volume += stats.notional
+                else:
+                    alt_volume += stats.notional
+        return version, coins, total, btc_volume, alt_volume
+
+    def top_coins(self, n: int = 5) -> List[Tuple[str, float]]:
+        _, coins, _, _, _ = self.snapshot()
+        return sorted(((c, s.notional) for c, s in coins.items()), key=lambda x: x[1], reverse=True)[:n]
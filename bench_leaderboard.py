@@ -0,0 +1,108 @@
+# -----------------------------
+# Benchmark: leaderboard parse, old resp.json() path vs LeaderboardCache._parse
+# -----------------------------
+# python bench_leaderboard.py [rows] [--fixture path]
+# Generates (or reuses) a stats-leaderboard shaped fixture, then measures
+# wall time and tracemalloc peak (separate runs, tracing slows parsing down)
+# for both parse paths, plus reloading the compact rows LEADERBOARD_CACHE
+# keeps, which is all a refresh within LEADERBOARD_TTL or a restart costs.
+from leaderboard import LeaderboardCache, ijson
+import argparse
+import json
+import os
+import random
+import time
+import tracemalloc
+
+FRAMES = ("day", "week", "month", "allTime")
+
+
+def make_fixture(path: str, rows: int):
+    rnd = random.Random(7)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write('{"leaderboardRows": [')
+        for i in range(rows):
+            row = {
+                "ethAddress": f"0x{i:040x}",
+                "accountValue": f"{rnd.uniform(0, 1e6):.2f}",
+                "displayName": f"trader{i}" if i % 5 == 0 else None,
+                "prize": 0,
+                "windowPerformances": [
+                    [frame, {
+                        "pnl": f"{rnd.uniform(-1e6, 1e6):.6f}",
+                        "roi": f"{rnd.uniform(-1, 5):.6f}",
+                        "vlm": f"{rnd.uniform(0, 1e8):.6f}",
+                    }] for frame in FRAMES
+                ],
+            }
+            f.write(("," if i else "") + json.dumps(row))
+        f.write("]}")
+
+
+class FileResponse:
+    """Just enough of an httpx streaming response for LeaderboardCache._parse."""
+    def __init__(self, path: str, chunk: int = 64 * 1024):
+        self.path = path
+        self.chunk = chunk
+
+    def read(self) -> bytes:
+        with open(self.path, "rb") as f:
+            return f.read()
+
+    def iter_bytes(self):
+        with open(self.path, "rb") as f:
+            while True:
+                block = f.read(self.chunk)
+                if not block:
+                    return
+                yield block
+
+
+def old_parse(path: str, timeframe: str = "allTime"):
+    # what get_leaderboard did before: whole document + a performances dict per row
+    data = json.loads(FileResponse(path).read())
+    out = []
+    for row in data.get("leaderboardRows", []):
+        performances = {tf[0]: tf[1] for tf in row.get("windowPerformances", [])}
+        pnl_data = performances.get(timeframe, {})
+        out.append((row.get("ethAddress"), row.get("displayName", ""),
+                    float(pnl_data.get("pnl", 0)), float(pnl_data.get("roi", 0)) * 100))
+    return out
+
+
+def load_cached(path: str):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)["rows"]
+
+
+def measure(fn, arg):
+    started = time.perf_counter()
+    result = fn(arg)
+    elapsed = time.perf_counter() - started
+    tracemalloc.start()
+    fn(arg)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return len(result), elapsed, peak
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("rows", nargs="?", type=int, default=50000)
+    parser.add_argument("--fixture", default="leaderboard_fixture.json")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.fixture):
+        make_fixture(args.fixture, args.rows)
+    print(f"fixture {args.fixture}: {os.path.getsize(args.fixture) / 1e6:.1f} MB, ijson {'on' if ijson else 'off'}")
+
+    cached = args.fixture + ".cache"
+    with open(cached, "w", encoding="utf-8") as f:
+        json.dump({"rows": LeaderboardCache._parse(FileResponse(args.fixture))}, f)
+
+    for label, fn, arg in (("resp.json()", old_parse, args.fixture),
+                           ("LeaderboardCache._parse", LeaderboardCache._parse, FileResponse(args.fixture)),
+                           ("cached compact rows", load_cached, cached)):
+        n, elapsed, peak = measure(fn, arg)
+        print(f"{label:<24} {n} rows  {elapsed:6.2f}s  peak {peak / 1e6:7.1f} MB")
+    os.remove(cached)
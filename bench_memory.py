@@ -0,0 +1,106 @@
+# -----------------------------
+# Benchmark: per-trader memory of the models, before and after slots/interning
+# -----------------------------
+# python bench_memory.py [traders] [positions_per_trader] [orders_per_trader]
+# "before" is a copy of the models as they were before slots, interned coins
+# and lazy order books; "after" is models.py. Coin names are built at run time
+# like json.loads would, so only the interned path shares them.
+from models import Trader, Position, Order, intern_coin
+from dataclasses import dataclass, field
+from typing import Dict, List
+import gc
+import sys
+import tracemalloc
+
+
+@dataclass
+class LegacyOrder:
+    oid: int = 0
+    limit: float = 0.0
+    size: float = 0.0
+    remain_size: float = 0.0
+    timestamp: int = 0
+    side: str = ""
+    action: str = ""
+
+
+@dataclass
+class LegacyPosition:
+    position_value: float = 0.0
+    size: float = 0.0
+    entry: float = 0.0
+    is_long: bool = None
+    leverage: int = 1
+    is_mod: bool = False
+    unpnl: float = 0.0
+    realized_pnl: float = 0.0
+    tp: LegacyOrder = None
+    sl: LegacyOrder = None
+    buy_order: Dict[int, LegacyOrder] = field(default_factory=dict)
+    sell_order: Dict[int, LegacyOrder] = field(default_factory=dict)
+    market: List[LegacyOrder] = field(default_factory=list)
+
+
+@dataclass
+class LegacyTrader:
+    name: str = None
+    address: str = None
+    pnl: float = None
+    positions: Dict[str, LegacyPosition] = field(default_factory=dict)
+    roi: float = None
+    volume: float = None
+    updated_at: float = 0.0
+
+
+def coin_name(j: int) -> str:
+    return "".join(["COIN", str(j)])  # a fresh string object, as parsed from JSON
+
+
+def build_before(n_traders, n_positions, n_orders):
+    traders = []
+    for i in range(n_traders):
+        t = LegacyTrader(name=f"t{i}", address=f"0x{i:040x}", pnl=1.0, roi=1.0, volume=0.0)
+        for j in range(n_positions):
+            t.positions[coin_name(j)] = LegacyPosition(size=1.0, entry=100.0, is_long=True, position_value=100.0)
+        for k in range(n_orders):
+            pos = t.positions[coin_name(k % n_positions)]
+            book = pos.buy_order if k % 2 else pos.sell_order
+            book[k] = LegacyOrder(oid=k, limit=99.0, size=1.0, remain_size=1.0, side="B" if k % 2 else "A")
+        traders.append(t)
+    return traders
+
+
+def build_after(n_traders, n_positions, n_orders):
+    traders = []
+    for i in range(n_traders):
+        t = Trader(name=f"t{i}", address=f"0x{i:040x}", pnl=1.0, roi=1.0, volume=0.0)
+        for j in range(n_positions):
+            t.positions[intern_coin(coin_name(j))] = Position(size=1.0, entry=100.0, is_long=True, position_value=100.0)
+        for k in range(n_orders):
+            pos = t.positions[intern_coin(coin_name(k % n_positions))]
+            pos.upsert_order(Order(oid=k, limit=99.0, size=1.0, remain_size=1.0, side="B" if k % 2 else "A"))
+        traders.append(t)
+    return traders
+
+
+def footprint(build, *args) -> int:
+    gc.collect()
+    tracemalloc.start()
+    base, _ = tracemalloc.get_traced_memory()
+    traders = build(*args)
+    gc.collect()
+    used, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del traders
+    return used - base
+
+
+if __name__ == "__main__":
+    n_traders = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    n_positions = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    n_orders = int(sys.argv[3]) if len(sys.argv) > 3 else 15
+    print(f"{n_traders} traders, {n_positions} positions and {n_orders} resting orders each")
+    before = footprint(build_before, n_traders, n_positions, n_orders)
+    after = footprint(build_after, n_traders, n_positions, n_orders)
+    print(f"before: {before / n_traders / 1024:6.1f} KB per trader")
+    print(f"after:  {after / n_traders / 1024:6.1f} KB per trader ({(1 - after / before) * 100:.0f}% less)")
@@ -0,0 +1,79 @@
+# -----------------------------
+# Benchmark: apply_open_orders on traders with hundreds of resting orders
+# -----------------------------
+# python bench_orders.py [traders] [orders_per_trader]
+# Builds synthetic frontendOpenOrders snapshots (limit orders plus position
+# TP/SL, some on coins clearinghouseState does not know) and times the first
+# load, an unchanged reload and a reload with 10% of the orders replaced.
+# Any /info request issued while applying a snapshot is counted: the old
+# loader reloaded positions once per order on an unknown coin.
+from config import Config
+from hyperliquid import HyperliquidAPI
+from models import Trader
+import random
+import sys
+import time
+
+COINS = ("BTC", "ETH", "SOL", "HYPE", "DOGE", "XRP", "SUI", "WIF")
+
+
+def snapshot(rnd: random.Random, n: int, oid_base: int) -> list:
+    orders = []
+    for i in range(n):
+        coin = COINS[i % len(COINS)]
+        px = 100.0 + rnd.uniform(-20, 20)
+        order = {
+            "coin": coin, "oid": oid_base + i, "side": "B" if i % 2 else "A",
+            "origSz": "1.0", "sz": f"{rnd.uniform(0.1, 1.0):.3f}", "timestamp": 1700000000000 + i,
+            "limitPx": f"{px:.2f}", "orderType": "Limit", "reduceOnly": i % 7 == 0,
+            "isTrigger": False, "isPositionTpsl": False, "triggerPx": "0.0",
+        }
+        if i % 50 == 0:
+            order.update(isTrigger=True, isPositionTpsl=True, orderType="Take Profit Market",
+                         triggerPx=f"{px:.2f}", reduceOnly=True)
+        orders.append(order)
+    return orders
+
+
+def state(coins) -> dict:
+    return {"assetPositions": [
+        {"type": "oneWay", "position": {"coin": c, "szi": "1.0", "positionValue": "100", "entryPx": "100",
+                                        "leverage": {"value": 5}, "unrealizedPnl": "0"}}
+        for c in coins
+    ]}
+
+
+if __name__ == "__main__":
+    n_traders = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    n_orders = int(sys.argv[2]) if len(sys.argv) > 2 else 300
+    rnd = random.Random(7)
+
+    api = HyperliquidAPI(Config())
+    requests = []
+    api._post_info = lambda payload: requests.append(payload) or {}
+
+    traders = [Trader(name=str(i), address=f"0x{i:040x}", pnl=0, roi=0, positions={}) for i in range(n_traders)]
+    books = [snapshot(rnd, n_orders, i * 1_000_000) for i in range(n_traders)]
+    for trader in traders:
+        # half the coins have a position, the rest become WAIT positions
+        api.apply_clearinghouse_state(trader, state(COINS[::2]), check=False)
+
+    def run(label, snapshots):
+        requests.clear()
+        started = time.perf_counter()
+        for trader, data in zip(traders, snapshots):
+            api.apply_open_orders(trader, data)
+        elapsed = time.perf_counter() - started
+        print(f"{label:<16} {elapsed * 1000:8.1f} ms total  {elapsed / len(traders) * 1e6:8.0f} us/trader"
+              f"  {len(requests)} extra requests")
+
+    print(f"{n_traders} traders x {n_orders} orders")
+    run("first load", books)
+    run("unchanged", books)
+    churned = []
+    for i, book in enumerate(books):
+        keep = [o for o in book if rnd.random() > 0.1]
+        churned.append(keep + snapshot(rnd, n_orders - len(keep), i * 1_000_000 + 500_000))
+    run("10% replaced", churned)
+    resting = sum(len(p.buy_order) + len(p.sell_order) for t in traders for p in t.positions.values())
+    print(f"resting limit orders indexed: {resting}")
@@ -0,0 +1,91 @@
+# -----------------------------
+# Benchmark: ShardCoordinator throughput for SHARDS=1/2/4 against mock_info
+# -----------------------------
+# python bench_shards.py [traders] [--seconds 20] [--shards 1,2,4] [--latency 0.02] [--fills 20]
+# Starts mock_info.py on a local port, writes a config.json (a copy of this
+# repo's with API_URL pointed at the mock, short poll intervals and the
+# SHARDS under test) into a temp dir and runs the coordinator there with a
+# monitor that only counts. Reports trader results and fills per second
+# after a warm-up; scaling needs as many free cores as shards.
+from models import Trader
+from watermarks import FillWatermarks
+import argparse
+import json
+import mock_info
+import os
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+class CountingMonitor:
+    def __init__(self):
+        self.fills = 0
+
+    def push_event(self, trader, events):
+        self.fills += len(events)
+
+
+def write_config(folder: str, port: int, shards: int):
+    with open(os.path.join(HERE, "config.json"), "r", encoding="utf-8") as f:
+        data = json.load(f)
+    data["attributes"].update({
+        "API_URL": f"http://127.0.0.1:{port}", "SHARDS": shards, "STREAMING": False,
+        "POLL_INTERVAL": 1, "POLL_MIN_INTERVAL": 1, "POLL_MAX_INTERVAL": 1,
+        "ORDER_ALERTS": False, "STATE_DB": os.path.join(folder, "state.db"),
+    })
+    with open(os.path.join(folder, "config.json"), "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=4)
+
+
+def run(shards: int, n_traders: int, warmup: float, seconds: float):
+    # imported after chdir: Config() and every worker read ./config.json
+    from config import Config
+    from hyperliquid import HyperliquidAPI
+    from sharding import ShardCoordinator
+
+    config = Config()
+    monitor = CountingMonitor()
+    coordinator = ShardCoordinator(HyperliquidAPI(config), config, monitor, FillWatermarks())
+    traders = [Trader(name=str(i), address=f"0x{i:040x}", pnl=0, roi=0, positions={}) for i in range(n_traders)]
+    coordinator.start()
+    coordinator.set_traders(traders)
+    time.sleep(warmup)
+    results, fills = coordinator.received, monitor.fills
+    time.sleep(seconds)
+    results, fills = coordinator.received - results, monitor.fills - fills
+    coordinator.stop()
+    for w in coordinator.workers:
+        w.join(timeout=10)
+    return results / seconds, fills / seconds
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("traders", nargs="?", type=int, default=400)
+    parser.add_argument("--seconds", type=float, default=20)
+    parser.add_argument("--warmup", type=float, default=5)
+    parser.add_argument("--shards", default="1,2,4")
+    parser.add_argument("--port", type=int, default=18777)
+    parser.add_argument("--mock-procs", type=int, default=2)
+    parser.add_argument("--latency", type=float, default=0.02)
+    parser.add_argument("--fills", type=int, default=20)
+    args = parser.parse_args()
+
+    servers = mock_info.start(args.port, args.mock_procs, args.latency, args.fills)
+    folder = tempfile.mkdtemp(prefix="bench_shards_")
+    os.chdir(folder)
+    print(f"{args.traders} traders, {args.fills} fills per poll, {args.latency * 1000:.0f} ms mock latency,"
+          f" {os.cpu_count()} cpus")
+    try:
+        base = None
+        for shards in (int(s) for s in args.shards.split(",")):
+            write_config(folder, args.port, shards)
+            results, fills = run(shards, args.traders, args.warmup, args.seconds)
+            base = base or results
+            print(f"SHARDS={shards}:  {results:8.1f} trader results/s  {fills:9.1f} fills/s"
+                  f"  x{results / base:.2f}")
+    finally:
+        for p in servers:
+            p.terminate()
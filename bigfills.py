@@ -0,0 +1,97 @@
+# -----------------------------
+# Big-fill Detector (rolling window)
+# -----------------------------
+from models import Trader, FillEvent
+from dataclasses import dataclass
+from collections import deque
+from typing import Dict, List, Optional
+import math
+import threading
+import numpy as np
+
+
+@dataclass(slots=True)
+class BigFill:
+    trader_name: Optional[str]
+    address: str
+    event: FillEvent
+    notional: float
+    percentile: float  # share of the coin's window below this fill, 0..100
+    zscore: float      # in log-notional space
+
+
+class CoinWindow:
+    """Fixed-size ring buffer of log10(notional) for one coin."""
+    __slots__ = ("values", "pos", "count")
+
+    def __init__(self, size: int):
+        self.values = np.zeros(size, dtype=np.float64)
+        self.pos = 0
+        self.count = 0
+
+    def view(self) -> np.ndarray:
+        return self.values[:self.count]
+
+    def push(self, value: float):
+        self.values[self.pos] = value
+        self.pos = (self.pos + 1) % len(self.values)
+        self.count = min(self.count + 1, len(self.values))
+
+
+class BigFillDetector:
+    """
+    Scores every ingested fill against the last BIG_FILL_WINDOW fills of the
+    same coin: percentile rank of its notional and z-score of log notional
+    (fill sizes are heavy-tailed, the log keeps the z-score meaningful).
+    A fill is big when it clears BIG_FILL_MIN_NOTIONAL and either
+    BIG_FILL_PERCENTILE or BIG_FILL_ZSCORE, once the coin has
+    BIG_FILL_MIN_SAMPLES fills of history. The last BIG_FILL_KEEP big
+    fills stay in memory for /events.
+    """
+    def __init__(self, config):
+        self.cfg = config
+        self.windows: Dict[str, CoinWindow] = {}
+        self.recent = deque(maxlen=max(1, config.big_fill_keep))
+        self.seen = 0
+        self._lock = threading.Lock()
+
+    def score(self, coin: str, notional: float):
+        """(percentile, zscore) against the coin's window, None until it has enough history."""
+        window = self.windows.get(coin)
+        if window is None or window.count < self.cfg.big_fill_min_samples:
+            return None
+        values = window.view()
+        x = math.log10(max(notional, 1e-9))
+        percentile = float(np.count_nonzero(values < x)) * 100.0 / len(values)
+        std = float(values.std())
+        zscore = (x - float(values.mean())) / std if std > 0 else 0.0
+        return percentile, zscore
+
+    def observe(self, trader: Trader, events: List[FillEvent]) -> List[BigFill]:
+        """Score then record each fill; returns the ones that crossed the thresholds."""
+        big = []
+        with self._lock:
+            for ev in events:
+                notional = ev.size * ev.price
+                if notional <= 0:
+                    continue
+                self.seen += 1
+                scored = self.score(ev.coin, notional)
+                window = self.windows.get(ev.coin)
+                if window is None:
+                    window = self.windows[ev.coin] = CoinWindow(max(2, self.cfg.big_fill_window))
+                window.push(math.log10(notional))
+
+                if scored is None or notional < self.cfg.big_fill_min_notional:
+                    continue
+                percentile, zscore = scored
+                if percentile >= self.cfg.big_fill_percentile or zscore >= self.cfg.big_fill_zscore:
+                    hit = BigFill(trader.name, trader.address, ev, notional, percentile, zscore)
+                    self.recent.append(hit)
+                    big.append(hit)
+        return big
+
+    def latest(self, limit: int = 15, coin: str = None) -> List[BigFill]:
+        with self._lock:
+            hits = [h for h in self.recent if coin is None or h.event.coin == coin]
+        return hits[-limit:][::-1]
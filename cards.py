@@ -0,0 +1,46 @@
+# -----------------------------
+# Live Position Cards (debounced edits)
+# -----------------------------
+from models import Trader
+from typing import Dict, List, Tuple, Optional
+import time
+
+
+class CardDebouncer:
+    """
+    Tracks which (trader, coin) cards need re-rendering and releases each one
+    at most once per CARD_EDIT_INTERVAL, however many fills marked it dirty.
+    The text is rendered when the card is released, so it shows the latest state.
+    """
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.last_edit: Dict[Tuple[str, str], float] = {}
+        self._dirty: Dict[Tuple[str, str], Tuple[Trader, float]] = {}
+
+    def touched(self, key: Tuple[str, str], now: float = None):
+        """A fresh message was sent for this card; the next edit waits a full interval."""
+        self.last_edit[key] = time.time() if now is None else now
+        self._dirty.pop(key, None)
+
+    def mark(self, trader: Trader, coin: str, now: float = None):
+        now = time.time() if now is None else now
+        key = (trader.address, coin)
+        if key in self._dirty:
+            return
+        self._dirty[key] = (trader, max(now, self.last_edit.get(key, 0) + self.interval))
+
+    def due(self, now: float = None) -> List[Tuple[Trader, str]]:
+        now = time.time() if now is None else now
+        out = []
+        for key, (trader, deadline) in list(self._dirty.items()):
+            if deadline <= now:
+                del self._dirty[key]
+                self.last_edit[key] = now
+                out.append((trader, key[1]))
+        return out
+
+    def next_timeout(self, now: float = None) -> Optional[float]:
+        if not self._dirty:
+            return None
+        now = time.time() if now is None else now
+        return max(0.0, min(d for _, d in self._dirty.values()) - now)
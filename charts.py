@@ -0,0 +1,91 @@
+# -----------------------------
+# Chart Rendering (process pool)
+# -----------------------------
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Callable, Dict, List, Tuple
+import multiprocessing
+import threading
+
+# (coin, longs, shorts, long_notional, short_notional)
+LongShortRow = Tuple[str, int, int, float, float]
+
+
+def _pyplot():
+    # imported in the worker on first use only; the bot process never loads matplotlib
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    return plt
+
+
+def _png(fig) -> bytes:
+    from io import BytesIO
+    buf = BytesIO()
+    fig.savefig(buf, format="png", dpi=110, bbox_inches="tight")
+    _pyplot().close(fig)
+    return buf.getvalue()
+
+
+def render_longshort(rows: List[LongShortRow]) -> bytes:
+    """Long share per coin, by position count and by notional, one bar pair per coin."""
+    plt = _pyplot()
+    coins = [r[0] for r in rows]
+    by_count = [r[1] / (r[1] + r[2]) * 100 if r[1] + r[2] else 0 for r in rows]
+    by_notional = [r[3] / (r[3] + r[4]) * 100 if r[3] + r[4] else 0 for r in rows]
+
+    fig, axes = plt.subplots(1, 2, figsize=(10, max(3, 0.3 * len(rows) + 1)), sharey=True)
+    for ax, values, title in ((axes[0], by_count, "Longs % (positions)"), (axes[1], by_notional, "Longs % (notional)")):
+        ax.barh(coins, values, color="#2ca02c")
+        ax.barh(coins, [100 - v for v in values], left=values, color="#d62728")
+        ax.axvline(50, color="black", linewidth=0.8, linestyle="--")
+        ax.set_xlim(0, 100)
+        ax.set_title(title)
+    axes[0].invert_yaxis()
+    fig.suptitle("Long / Short by coin")
+    return _png(fig)
+
+
+def render_volume(btc_volume: float, alt_volume: float, top: List[Tuple[str, float]]) -> bytes:
+    """BTC vs altcoin split next to the largest coins by notional."""
+    plt = _pyplot()
+    fig, (pie, bars) = plt.subplots(1, 2, figsize=(10, 4))
+    pie.pie([btc_volume, alt_volume], labels=["BTC", "Altcoins"], autopct="%1.1f%%",
+            colors=["#f7931a", "#1f77b4"], startangle=90)
+    pie.set_title("BTC vs Altcoins")
+    bars.barh([c for c, _ in top], [v for _, v in top], color="#1f77b4")
+    bars.invert_yaxis()
+    bars.set_title("Top coins by notional, USD")
+    return _png(fig)
+
+
+class ChartRenderer:
+    """
+    Renders charts in a small spawned process pool so neither the bot thread
+    nor the GIL is held by matplotlib. Results are cached per chart key and
+    aggregate version: asking again before the aggregates change returns
+    the same (possibly still running) Future.
+    """
+    def __init__(self, config):
+        self.cfg = config
+        self._pool = None
+        self._cache: Dict[Tuple, Tuple[int, Future]] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=max(1, self.cfg.chart_workers),
+                                             mp_context=multiprocessing.get_context("spawn"))
+        return self._pool
+
+    def render(self, key: Tuple, version: int, fn: Callable, *args) -> Future:
+        """Future of PNG bytes for fn(*args), reused while version is unchanged."""
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None and cached[0] == version:
+                fut = cached[1]
+                if not (fut.done() and fut.exception() is not None):
+                    return fut
+            fut = self.pool.submit(fn, *args)
+            self._cache[key] = (version, fut)
+            return fut
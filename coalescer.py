@@ -0,0 +1,66 @@
+# -----------------------------
+# Fill Coalescing
+# -----------------------------
+from models import Trader, FillEvent
+from dataclasses import replace
+from typing import Dict, List, Tuple, Optional
+import time
+
+
+def merge_fills(events: List[FillEvent]) -> FillEvent:
+    """
+    One digest FillEvent for fills of the same trader/coin/direction:
+    summed size and closed PnL, VWAP price, start position of the first fill.
+    """
+    if len(events) == 1:
+        return events[0]
+    events = sorted(events, key=lambda e: e.time)
+    size = sum(e.size for e in events)
+    vwap = sum(e.price * e.size for e in events) / size if size else events[-1].price
+    return replace(
+        events[-1],
+        price=float(f"{vwap:.8g}"),
+        size=round(size, 8),
+        start_position=events[0].start_position,
+        closedPnl=sum(e.closedPnl for e in events),
+        fee=sum(e.fee for e in events),
+        builder_fee=sum(e.builder_fee for e in events),
+        fills=sum(e.fills for e in events),
+    )
+
+
+class FillCoalescer:
+    """
+    Holds fills for FILL_COALESCE_WINDOW seconds after the first fill of a
+    (trader, coin, direction) group, then releases the whole group at once.
+    """
+    def __init__(self, window: float):
+        self.window = window
+        # key -> (trader, events, deadline); dict keeps first-arrival order
+        self._groups: Dict[Tuple[str, str, str], Tuple[Trader, List[FillEvent], float]] = {}
+
+    def add(self, trader: Trader, events: List[FillEvent], now: float = None):
+        now = time.time() if now is None else now
+        for ev in events:
+            key = (trader.address, ev.coin, ev.direction)
+            group = self._groups.get(key)
+            if group is None:
+                self._groups[key] = (trader, [ev], now + self.window)
+            else:
+                group[1].append(ev)
+
+    def due(self, now: float = None) -> List[Tuple[Trader, List[FillEvent]]]:
+        now = time.time() if now is None else now
+        out = []
+        for key, (trader, events, deadline) in list(self._groups.items()):
+            if deadline <= now:
+                del self._groups[key]
+                out.append((trader, events))
+        return out
+
+    def next_timeout(self, now: float = None) -> Optional[float]:
+        """Seconds until the earliest group is due, None when nothing is buffered."""
+        if not self._groups:
+            return None
+        now = time.time() if now is None else now
+        return max(0.0, min(d for _, _, d in self._groups.values()) - now)
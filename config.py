@@ -53,6 +53,123 @@ class Config:
     @property
     def period(self):
         return self._data["attributes"]["PERIOD"]
+    @property
+    def sort_by(self):
+        return self._data["attributes"].get("SORT_BY", "pnl")
+    @property
+    def poll_concurrency(self):
+        return int(self._data["attributes"].get("POLL_CONCURRENCY", 8))
+    @property
+    def http2(self):
+        return bool(self._data["attributes"].get("HTTP2", False))
+    @property
+    def http_pool_size(self):
+        return int(self._data["attributes"].get("HTTP_POOL_SIZE", 20))
+    @property
+    def http_timeouts(self):
+        return self._data["attributes"].get("HTTP_TIMEOUTS", {})
+    @property
+    def poll_min_interval(self):
+        return float(self._data["attributes"].get("POLL_MIN_INTERVAL", 10))
+    @property
+    def poll_max_interval(self):
+        return float(self._data["attributes"].get("POLL_MAX_INTERVAL", 900))
+    @property
+    def poll_backoff(self):
+        return float(self._data["attributes"].get("POLL_BACKOFF", 2.0))
+    @property
+    def leaderboard_ttl(self):
+        return float(self._data["attributes"].get("LEADERBOARD_TTL", 300))
+    @property
+    def leaderboard_cache_path(self):
+        return self._data["attributes"].get("LEADERBOARD_CACHE", "leaderboard_cache.json")
+    @property
+    def state_db(self):
+        return self._data["attributes"].get("STATE_DB", "state.db")
+    @property
+    def state_save_interval(self):
+        return float(self._data["attributes"].get("STATE_SAVE_INTERVAL", 30))
+    @property
+    def tg_global_rate(self):
+        return float(self._data["attributes"].get("TG_GLOBAL_RATE", 30))
+    @property
+    def tg_chat_rate(self):
+        return float(self._data["attributes"].get("TG_CHAT_RATE", 1))
+    @property
+    def tg_group_rate(self):
+        return float(self._data["attributes"].get("TG_GROUP_RATE", 20))
+    @property
+    def tg_chat_burst(self):
+        return float(self._data["attributes"].get("TG_CHAT_BURST", 3))
+    @property
+    def fill_coalesce_window(self):
+        return float(self._data["attributes"].get("FILL_COALESCE_WINDOW", 5))
+    @property
+    def card_edit_interval(self):
+        return float(self._data["attributes"].get("CARD_EDIT_INTERVAL", 30))
+    @property
+    def snapshot_max_age(self):
+        return float(self._data["attributes"].get("SNAPSHOT_MAX_AGE", 300))
+    @property
+    def order_alerts(self):
+        return bool(self._data["attributes"].get("ORDER_ALERTS", False))
+    @property
+    def snapshot_diff(self):
+        return bool(self._data["attributes"].get("SNAPSHOT_DIFF", False))
+    @property
+    def checkpoint_interval(self):
+        return float(self._data["attributes"].get("CHECKPOINT_INTERVAL", 300))
+    @property
+    def chart_workers(self):
+        return int(self._data["attributes"].get("CHART_WORKERS", 1))
+    @property
+    def api_url(self):
+        return self._data["attributes"].get("API_URL", "https://api.hyperliquid.xyz")
+    @property
+    def shards(self):
+        return int(self._data["attributes"].get("SHARDS", 0))
+    @property
+    def big_fill_window(self):
+        return int(self._data["attributes"].get("BIG_FILL_WINDOW", 500))
+    @property
+    def big_fill_min_samples(self):
+        return int(self._data["attributes"].get("BIG_FILL_MIN_SAMPLES", 30))
+    @property
+    def big_fill_percentile(self):
+        return float(self._data["attributes"].get("BIG_FILL_PERCENTILE", 99))
+    @property
+    def big_fill_zscore(self):
+        return float(self._data["attributes"].get("BIG_FILL_ZSCORE", 3.0))
+    @property
+    def big_fill_min_notional(self):
+        return float(self._data["attributes"].get("BIG_FILL_MIN_NOTIONAL", 50000))
+    @property
+    def big_fill_keep(self):
+        return int(self._data["attributes"].get("BIG_FILL_KEEP", 100))
+    @property
+    def big_fill_alerts(self):
+        return bool(self._data["attributes"].get("BIG_FILL_ALERTS", False))
+    @property
+    def mids_interval(self):
+        return float(self._data["attributes"].get("MIDS_INTERVAL", 10))
+    @property
+    def liq_alert_levels(self):
+        return [float(x) for x in self._data["attributes"].get("LIQ_ALERT_LEVELS", [10, 5, 2])]
+    @property
+    def liq_hysteresis(self):
+        return float(self._data["attributes"].get("LIQ_HYSTERESIS", 0.25))
+    @property
+    def streaming(self):
+        return bool(self._data["attributes"].get("STREAMING", False))
+    @property
+    def ws_url(self):
+        return self._data["attributes"].get("WS_URL", "wss://api.hyperliquid.xyz/ws")
+    @property
+    def ws_users_per_connection(self):
+        return int(self._data["attributes"].get("WS_USERS_PER_CONNECTION", 10))
+    @property
+    def ws_reconnect_delay(self):
+        return float(self._data["attributes"].get("WS_RECONNECT_DELAY", 3))
     
 
     def attributes_keys(self):
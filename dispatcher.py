@@ -0,0 +1,199 @@
+# -----------------------------
+# Telegram Outbound Dispatcher
+# -----------------------------
+from telebot import TeleBot
+from telebot.apihelper import ApiTelegramException
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Optional
+import heapq
+import threading
+import time
+
+PRIORITY_ALERT = 0   # fills, position changes
+PRIORITY_NORMAL = 1  # command answers
+PRIORITY_BULK = 2    # /active, /sniper, leaderboard dumps
+
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.stamp = time.monotonic()
+        self.blocked_until = 0.0  # set from a 429 retry_after
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.stamp) * self.rate)
+        self.stamp = now
+
+    def wait_time(self, now: float) -> float:
+        """Seconds until a token is available (0 when one can be taken now)."""
+        self._refill(now)
+        if now < self.blocked_until:
+            return self.blocked_until - now
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def take(self, now: float):
+        self._refill(now)
+        self.tokens -= 1
+
+
+@dataclass(order=True)
+class Outbound:
+    priority: int
+    seq: int
+    chat_id: Any = field(compare=False)
+    text: str = field(compare=False)
+    kwargs: Dict = field(compare=False, default_factory=dict)
+    reply_to: Any = field(compare=False, default=None)
+    on_sent: Optional[Callable] = field(compare=False, default=None)
+    edit_of: Any = field(compare=False, default=None)  # message id (or callable) to edit instead of sending
+    photo: Any = field(compare=False, default=None)    # PNG bytes; text becomes the caption
+
+
+class TelegramDispatcher(threading.Thread):
+    """
+    Single sender for every outbound Telegram message. A global token bucket
+    and one bucket per chat model Telegram's limits (TG_GLOBAL_RATE msg/s
+    overall, TG_CHAT_RATE msg/s per private chat, TG_GROUP_RATE msg/min per
+    group). Lower priority numbers go first; within a lane order is FIFO.
+    A 429 blocks that chat for retry_after and puts the message back in place.
+    """
+    def __init__(self, bot: TeleBot, config):
+        self.bot = bot
+        self.cfg = config
+        self.global_bucket = TokenBucket(config.tg_global_rate, config.tg_global_rate)
+        self.chat_buckets: Dict[Any, TokenBucket] = {}
+        self._heap = []
+        self._seq = 0
+        self._cond = threading.Condition()
+        self.sent = 0
+        self.retried = 0
+        super().__init__(daemon=True)
+
+    def _bucket(self, chat_id) -> TokenBucket:
+        bucket = self.chat_buckets.get(chat_id)
+        if bucket is None:
+            # group and channel ids are negative
+            if str(chat_id).startswith("-"):
+                rate = self.cfg.tg_group_rate / 60.0
+            else:
+                rate = self.cfg.tg_chat_rate
+            bucket = TokenBucket(rate, self.cfg.tg_chat_burst)
+            self.chat_buckets[chat_id] = bucket
+        return bucket
+
+    def send(self, chat_id, text: str, priority: int = PRIORITY_NORMAL, reply_to=None,
+             on_sent: Callable = None, **kwargs):
+        """
+        Queue a message. reply_to may be a message id or a callable returning one,
+        resolved right before sending so it can point at a message queued earlier.
+        on_sent(message) runs on the dispatcher thread after delivery.
+        """
+        kwargs.setdefault("parse_mode", "Markdown")
+        with self._cond:
+            self._seq += 1
+            heapq.heappush(self._heap, Outbound(priority, self._seq, chat_id, text, kwargs, reply_to, on_sent))
+            self._cond.notify()
+
+    def send_photo(self, chat_id, photo: bytes, caption: str = "", priority: int = PRIORITY_NORMAL, reply_to=None,
+                   on_sent: Callable = None, **kwargs):
+        """Queue a photo; same ordering and rate limits as send()."""
+        kwargs.setdefault("parse_mode", "Markdown")
+        with self._cond:
+            self._seq += 1
+            heapq.heappush(self._heap, Outbound(priority, self._seq, chat_id, caption, kwargs, reply_to, on_sent,
+                                                photo=photo))
+            self._cond.notify()
+
+    def edit(self, chat_id, message_id, text: str, priority: int = PRIORITY_ALERT, **kwargs):
+        """Queue an edit_message_text; message_id may be a callable like reply_to."""
+        kwargs.setdefault("parse_mode", "Markdown")
+        with self._cond:
+            self._seq += 1
+            heapq.heappush(self._heap, Outbound(priority, self._seq, chat_id, text, kwargs, edit_of=message_id))
+            self._cond.notify()
+
+    def pending(self) -> int:
+        with self._cond:
+            return len(self._heap)
+
+    def _next(self) -> Outbound:
+        """Block until the best message whose chat has budget can go out."""
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                wait = None
+                skipped = []
+                item = None
+                blocked = set()
+                while self._heap:
+                    cand = heapq.heappop(self._heap)
+                    if cand.chat_id in blocked:
+                        skipped.append(cand)
+                        continue
+                    chat_wait = self._bucket(cand.chat_id).wait_time(now)
+                    if chat_wait > 0:
+                        # keep per-chat order: later messages of this chat wait too
+                        blocked.add(cand.chat_id)
+                        skipped.append(cand)
+                        wait = chat_wait if wait is None else min(wait, chat_wait)
+                        continue
+                    item = cand
+                    break
+                for s in skipped:
+                    heapq.heappush(self._heap, s)
+
+                if item is not None:
+                    global_wait = self.global_bucket.wait_time(now)
+                    if global_wait == 0:
+                        self.global_bucket.take(now)
+                        self._bucket(item.chat_id).take(now)
+                        return item
+                    heapq.heappush(self._heap, item)
+                    wait = global_wait if wait is None else min(wait, global_wait)
+
+                self._cond.wait(timeout=wait)
+
+    def _requeue(self, item: Outbound):
+        with self._cond:
+            heapq.heappush(self._heap, item)
+            self._cond.notify()
+
+    def run(self):
+        while True:
+            item = self._next()
+            kwargs = dict(item.kwargs)
+            try:
+                if item.edit_of is not None:
+                    message_id = item.edit_of() if callable(item.edit_of) else item.edit_of
+                    if message_id is None:
+                        continue
+                    sent = self.bot.edit_message_text(item.text, chat_id=item.chat_id, message_id=message_id, **kwargs)
+                else:
+                    reply_to = item.reply_to() if callable(item.reply_to) else item.reply_to
+                    if reply_to is not None:
+                        kwargs["reply_to_message_id"] = reply_to
+                    if item.photo is not None:
+                        sent = self.bot.send_photo(item.chat_id, item.photo, caption=item.text or None, **kwargs)
+                    else:
+                        sent = self.bot.send_message(item.chat_id, item.text, **kwargs)
+                self.sent += 1
+                if item.on_sent is not None:
+                    item.on_sent(sent)
+            except ApiTelegramException as e:
+                if e.result_json and e.result_json.get("error_code") == 429:
+                    retry_after = e.result_json.get("parameters", {}).get("retry_after", 1)
+                    print(f"Rate limit hit for {item.chat_id}, requeue after {retry_after} seconds")
+                    with self._cond:
+                        self._bucket(item.chat_id).blocked_until = time.monotonic() + retry_after
+                    self.retried += 1
+                    self._requeue(item)
+                elif "message is not modified" in str(e):
+                    pass
+                else:
+                    print(f"Telegram send failed: {e}")
+            except Exception as e:
+                print(f"Telegram send failed: {e}")
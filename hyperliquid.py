@@ -1,29 +1,87 @@
 # -----------------------------
 # Hyperliquid API Controller (Fixed: Stats Endpoint for Leaderboard)
 # -----------------------------
-from models import Trader, Position, Order, FillEvent
+from models import Trader, Position, Order, FillEvent, PositionChange, intern_coin
 from typing import List, Dict, Optional, Set, Tuple
-import requests
+from transport import HttpTransport
+from leaderboard import LeaderboardCache, LeaderboardIndex, FRAMES
+from orders_diff import OrderDiffEngine
+from ledger import PositionLedger
+from aggregates import MarketAggregates
+from marks import MidPriceCache, PositionTable
 import json
 import time
 from datetime import datetime, timedelta
 from copy import deepcopy
 class HyperliquidAPI:
+    FILLS_PAGE_LIMIT = 2000  # userFillsByTime returns at most this many fills per call
+
     def __init__(self, config):
         self.cfg = config  
-        self.base = "https://api.hyperliquid.xyz"  # Official for fills/positions
+        self.base = config.api_url  # Official for fills/positions
         self.stats_base = "https://stats-data.hyperliquid.xyz/Mainnet"  # Leaderboard
-        
-        
+        self.http = HttpTransport(config)
+        self.leaderboard = LeaderboardCache(config, self.http)
+        self.leaderboard_index = LeaderboardIndex()
+        self.order_diff = OrderDiffEngine()
+        self.ledger = PositionLedger()
+        self.mids = MidPriceCache()
+        self.position_table = PositionTable(self.mids)
+        self.aggregates = MarketAggregates(self.position_table)
+        self.liquidation_sink = None  # callable([LiquidationHit]) fed by refresh_mids
+        self.reload_sink = None  # callable([Trader]) to reload traders whose liquidation price is unknown
+        self.order_sink = None  # callable(trader, [OrderEvent]) fed by apply_open_orders
+        self.position_sizes: Dict[str, Dict[str, Tuple[float, float]]] = {}  # address -> coin -> (szi, mark)
+
+    def retain(self, addresses):
+        """Drop per-trader diff state of traders that are no longer tracked."""
+        keep = set(addresses)
+        self.order_diff.retain(keep)
+        self.aggregates.retain(keep)
+        self.position_table.retain(keep)
+        for address in [a for a in self.position_sizes if a not in keep]:
+            del self.position_sizes[address]
+
+    def positions_changed(self, trader: Trader):
+        """Keep the derived views (aggregates, columnar position table) in step with trader.positions."""
+        self.aggregates.sync_trader(trader)
+        self.position_table.sync_trader(trader)
+
+    def refresh_mids(self) -> int:
+        """
+        One allMids request for every coin, then a vectorized revaluation of all
+        positions; returns how many moved. Marks stay in position_table.
+        """
+        data = self._post_info({"type": "allMids"})
+        if not isinstance(data, dict) or not data:
+            return 0
+        self.mids.update(data)
+        moved = self.position_table.revalue()
+        # positions opened or flipped by fills have no liquidation price until a state load
+        unpriced = self.position_table.unpriced_traders()
+        if unpriced and self.reload_sink is not None:
+            self.reload_sink(unpriced)
+        hits = self.position_table.liquidation_hits(self.cfg.liq_alert_levels, self.cfg.liq_hysteresis)
+        if hits and self.liquidation_sink is not None:
+            self.liquidation_sink(hits)
+        return moved
 
     def _post_info(self, payload: Dict) -> Dict:
         """Official /info POST for fills/positions."""
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (compatible; Bot)',
-            'Content-Type': 'application/json'
-        }
         try:
-            resp = requests.post(f"{self.base}/info", json=payload, headers=headers, timeout=10)
+            resp = self.http.post(f"{self.base}/info", payload)
+            if resp.status_code != 200:
+                print(f"ERROR: {resp.text[:100]}...")
+                return {}
+            return resp.json()
+        except Exception as e:
+            print(f"Request failed: {e}")
+            return {}
+
+    async def _apost_info(self, payload: Dict) -> Dict:
+        """Async twin of _post_info on the same pooled transport."""
+        try:
+            resp = await self.http.apost(f"{self.base}/info", payload)
             if resp.status_code != 200:
                 print(f"ERROR: {resp.text[:100]}...")
                 return {}
@@ -32,10 +90,11 @@ class HyperliquidAPI:
             print(f"Request failed: {e}")
             return {}
 
-    def get_leaderboard(self, timeframe: str = "allTime", limit: int = 100) -> List[Trader]:
+    def get_leaderboard(self, timeframe: str = "allTime", limit: int = 100, sort_by: str = "pnl") -> List[Trader]:
         """
         Fetch leaderboard from stats endpoint.
         Timeframe: "day", "week", "month", "allTime".
+        sort_by: "pnl", "roi" or "volume" for the chosen timeframe.
         """
         valid_frames = ["day", "week", "month", "allTime"]
         # self.timefr = timeframe
@@ -44,99 +103,64 @@ class HyperliquidAPI:
 
         url = f"{self.stats_base}/leaderboard"
         try:
-            resp = requests.get(url, timeout=20)
-            if resp.status_code != 200:
-                print(f"ERROR: {resp.text[:100]}...")
-                return []
-
-            data = resp.json()
-            rows = data.get("leaderboardRows", [])[:]  # oversample
-            traders = []
-
-            for row in rows:
-                try:
-                    address = row.get("ethAddress", "")
-                    if not address:
-                        continue
-
-                    # performances = row.get("windowPerformances",[])[valid_frames[timeframe]]
-                    performances = {tf[0]: tf[1] for tf in row.get("windowPerformances", [])}
-                    pnl_data = performances.get(timeframe, {})
-                    pnl = float(pnl_data.get("pnl", 0))
-                    roi = float(pnl_data.get("roi", 0)) * 100
-                    name = row.get("displayName", "")
-                    # volume = float(pnl_data.get("vlm", 0))
-
-                    # Apply filters
-
-                    if pnl >= self.cfg.pnl_min and roi >= self.cfg.min_roi:
-                        # print(f'allow pnl : {pnl} roi: {roi}') 
-                        traders.append(
-                            Trader(
-                                name=name,
-                                address=address,
-                                pnl=pnl,
-                                positions={},
-                                roi=roi
-                            )
-                        )
-                    if len(traders) > limit:
-                        break  
-                except (KeyError, ValueError, TypeError) as e:
-                    print(f"Parse error for {row.get('ethAddress', 'unknown')}: {e}")
-                    continue
-
-            # Sort by PnL descending
-            print(f'trades len {len(traders)}')
-            traders.sort(key=lambda x: x.pnl, reverse=True)
-            traders = traders[:limit]
-            return traders
-
+            rows = self.leaderboard.get(url)
         except Exception as e:
             print(f"Stats request failed: {e}")
             return []
 
-    def position_update_local(self, pos:Position, event:FillEvent):
-        # start_position + size
-        if "Long" in event.direction and "Open" in event.direction:
-            # 
-            pos.size = event.start_position + event.size 
+        if self.leaderboard_index.version != self.leaderboard.version:
+            self.leaderboard_index.build(rows, self.leaderboard.version)
+
+        # Apply filters
+        index = self.leaderboard_index
+        f = FRAMES.index(timeframe)
+        selected = index.select(timeframe, self.cfg.pnl_min, self.cfg.min_roi, limit, sort_by)
+        traders = [
+            Trader(
+                name=index.name[i],
+                address=index.address[i],
+                pnl=float(index.pnl[f, i]),
+                positions={},
+                roi=float(index.roi[f, i]),
+                volume=float(index.vlm[f, i])
+            )
+            for i in selected
+        ]
+        print(f'trades len {len(traders)} of {len(index)} (sorted by {sort_by})')
+        return traders
 
-        if "Long" in event.direction and "Close" in event.direction:
-            # 
-            pos.size = event.start_position - event.size
+    def apply_fills(self, trader: Trader, events: List[FillEvent]):
+        """Fold fills into trader.positions without a request (see PositionLedger)."""
+        self.ledger.apply_fills(trader, events)
+        self.positions_changed(trader)
 
-        if "Short" in event.direction and "Open" in event.direction:
-            
-            pos.size = event.start_position - event.size
-
-        if "Short" in event.direction and "Close" in event.direction:
-
-            pos.size = event.start_position + event.size
-
-        pos.unpnl -= int(event.closedPnl)
-        if pos.size == 0:
-            pos.is_long = None
-            pos.leverage = 0
-            pos.position_value = 0
-            pos.entry = 0
-            pos.unpnl = 0
-        if pos.size > 0:
-            pos.is_long = True
-            pos.position_value = event.price*pos.size
-        if pos.size < 0:
-            pos.is_long = False
-            pos.position_value = event.price*pos.size
+    def checkpoint_due(self, trader: Trader) -> bool:
+        return time.time() - trader.updated_at >= self.cfg.checkpoint_interval
 
     def position_update(self, trader: Trader):
         payload = {"type": "clearinghouseState", "user": trader.address}
         data = self._post_info(payload)
+        self.apply_clearinghouse_state(trader, data)
+
+    def apply_clearinghouse_state(self, trader: Trader, data: Dict, check: bool = True):
+        """
+        Write a clearinghouseState response into trader.positions.
+        Coins missing from the snapshot are closed: dropped, or kept as a
+        WAIT position while they still have resting orders. With check, the
+        state folded from fills since the last load is compared first.
+        """
+        if not isinstance(data, dict) or "assetPositions" not in data:
+            return
+        check = check and trader.updated_at > 0
+        trader.updated_at = time.time()
         asset_positions = data.get("assetPositions", [])
+        seen = set()
 
         for p in asset_positions:
             position = p.get("position")
             if not position:
                 continue
+            seen.add(position.get("coin"))
             if p.get("type") != "oneWay":
                 continue
 
@@ -144,40 +168,146 @@ class HyperliquidAPI:
             entry       = float( position.get("entryPx"))
             leverage    = int(position.get("leverage").get("value"))
             size        = float(position.get("szi"))
-            coin        = (position.get("coin"))
+            coin        = intern_coin(position.get("coin"))
             unpnl       = float(position.get("unrealizedPnl"))
+            liq_px      = float(position.get("liquidationPx") or 0)
+            margin_used = float(position.get("marginUsed") or 0)
             is_buy = False
             if size > 0:
                 is_buy = True
 
-            trader.positions[coin] = Position(
-                position_value=position_value,
-                size=size,
-                entry=entry,
-                is_long=is_buy,
-                leverage=leverage,
-                is_mod=True,
-                unpnl=unpnl,
-            
-                buy_order=[],
-                sell_order=[],
-                market=[]
-            )
-        
+            pos = trader.positions.get(coin)
+            if pos is None:
+                pos = trader.positions[coin] = Position()
+            elif check and pos.is_long is not None:
+                self.ledger.check(trader.address, coin, pos, size, entry)
+            # update in place: the oid-indexed order book of the position survives
+            pos.position_value = position_value
+            pos.size = size
+            pos.entry = entry
+            pos.is_long = is_buy
+            pos.leverage = leverage
+            pos.is_mod = True
+            pos.unpnl = unpnl
+            pos.liquidation_px = liq_px
+            pos.margin_used = margin_used
+
+        # includes coins a fill already closed (is_long None): without orders they go too
+        for coin in [c for c in trader.positions if c not in seen]:
+            pos = trader.positions[coin]
+            if check and pos.is_long is not None:
+                self.ledger.check(trader.address, coin, pos, 0.0, 0.0)
+            if pos.buy_order or pos.sell_order or pos.tp is not None or pos.sl is not None:
+                pos.size = pos.position_value = pos.entry = pos.unpnl = 0
+                pos.liquidation_px = pos.margin_used = 0
+                pos.is_long = None
+                pos.leverage = 0
+            else:
+                del trader.positions[coin]
+        self.positions_changed(trader)
+
+    def position_changes(self, trader: Trader, data: Dict) -> List[PositionChange]:
+        """
+        Diff a clearinghouseState response against the sizes seen at the previous
+        call for this trader (seeded from trader.positions the first time).
+        Call it before apply_clearinghouse_state.
+        """
+        if not isinstance(data, dict) or "assetPositions" not in data:
+            return []
+        prev = self.position_sizes.get(trader.address)
+        if prev is None:
+            prev = {
+                coin: (pos.size, abs(pos.position_value / pos.size))
+                for coin, pos in trader.positions.items() if pos.is_long is not None and pos.size
+            }
+
+        new = {}
+        for p in data.get("assetPositions", []):
+            position = p.get("position")
+            if not position:
+                continue
+            size = float(position.get("szi", 0))
+            if size:
+                new[position.get("coin")] = (size, abs(float(position.get("positionValue", 0)) / size))
+        self.position_sizes[trader.address] = new
+
+        changes = []
+        for coin in list(prev) + [c for c in new if c not in prev]:
+            old_size, old_px = prev.get(coin, (0.0, 0.0))
+            size, px = new.get(coin, (0.0, old_px))
+            if size == old_size:
+                continue
+            if old_size == 0:
+                kind = "open"
+            elif size == 0:
+                kind = "close"
+            elif (size > 0) != (old_size > 0):
+                kind = "flip"
+            elif abs(size) > abs(old_size):
+                kind = "increase"
+            else:
+                kind = "reduce"
+            changes.append(PositionChange(kind=kind, coin=coin, prev_size=old_size, size=size, price=px))
+        return changes
+
+    def change_fill(self, change: PositionChange) -> FillEvent:
+        """Stand-in FillEvent for a position change whose fills could not be fetched."""
+        if change.kind == "flip":
+            direction = "Long > Short" if change.prev_size > 0 else "Short > Long"
+        elif change.kind in ("open", "increase"):
+            direction = "Open Long" if change.size > 0 else "Open Short"
+        else:
+            direction = "Close Long" if change.prev_size > 0 else "Close Short"
+        return FillEvent(
+            closedPnl=0.0,
+            coin=change.coin,
+            crossed=False,
+            direction=direction,
+            hash="",
+            oid=0,
+            price=float(f"{change.price:.8g}"),
+            side="B" if change.size > change.prev_size else "A",
+            start_position=change.prev_size,
+            size=round(abs(change.size - change.prev_size), 8),
+            time=int(time.time() * 1000),
+            fee=0.0,
+            fee_token="",
+            builder_fee=0.0,
+            tid=0,
+        )
 
     def load_limit_orders(self, trader: Trader):
         payload = {"type": "frontendOpenOrders", "user": trader.address}
         data = self._post_info(payload)
+        self.apply_open_orders(trader, data)
 
-        for c in trader.positions.keys():
-            trader.positions[c].buy_order = []
-            trader.positions[c].sell_order = []
-            trader.positions[c].market = []
+    def load_trader(self, trader: Trader):
+        """Positions then orders, exactly one request each."""
+        self.position_update(trader)
+        self.load_limit_orders(trader)
 
-        
+    def apply_open_orders(self, trader: Trader, data: List):
+        """
+        Sync a frontendOpenOrders snapshot into the per-position order books.
+        Orders are upserted by oid and those missing from the snapshot removed,
+        so the cost is O(orders) with no extra requests: a coin that
+        clearinghouseState does not know becomes a WAIT position.
+        With ORDER_ALERTS, changes against the previous snapshot go to
+        order_sink as OrderEvents once the books already reflect the snapshot.
+        """
+        if not isinstance(data, list):
+            return
+        if self.cfg.order_alerts:
+            events = self.order_diff.diff(trader.address, data)
+        else:
+            # alerts are opt-in; turning them on later starts from a fresh baseline
+            self.order_diff.books.pop(trader.address, None)
+            events = []
+
+        seen = set()
         for o in data:
-            coin=o.get("coin")
-            oid=o.get("oid", 0)
+            coin=intern_coin(o.get("coin"))
+            oid=int(o.get("oid", 0))
             orig_size=float(o.get("origSz", 0))
             remaining_size=float(o.get("sz", 0))
             timestamp=int(o.get("timestamp", time.time() * 1000))            
@@ -188,27 +318,14 @@ class HyperliquidAPI:
 
             pos = trader.positions.get(coin, None)
             if pos is None:
-                self.position_update(trader)
-                pos = trader.positions.get(coin, None)
-                if pos is None:
-                    trader.positions[coin] = Position(
-                        position_value=0.0,
-                        size=0.0,
-                        entry=0.0,
-                        is_long=None,
-                        leverage=1,
-                        is_mod=True,
-                        unpnl=0.0,
-                        buy_order=[],
-                        sell_order=[],
-                        market=[]
-                    )
-                    pos =  trader.positions[coin]
+                pos = trader.positions[coin] = Position(is_long=None, is_mod=True)
+            seen.add(oid)
             
             if is_trigger and is_position_tpsl:                
                 trigger_price=float(o.get("triggerPx", 0))
 
                 tpsl_order = Order(
+                    oid=oid,
                     limit=trigger_price,
                     size=orig_size,
                     remain_size=remaining_size,
@@ -233,46 +350,81 @@ class HyperliquidAPI:
                 limit_price=float(o.get("limitPx", 0))
 
                 if order_type == "Limit":
-                    limit_order = Order(
+                    pos.upsert_order(Order(
+                        oid=oid,
                         limit=limit_price,
                         size=orig_size,
                         remain_size=remaining_size,
                         timestamp=timestamp,
                         side=side,
                         action="output" if reduce_only else "input"
-                    )
-                    if limit_order.side == "B":
-                        is_exist = 0
-                        for b in pos.buy_order:
-                            if b.oid == oid:
-                                is_exist=1
-                        if is_exist == 0:
-                            pos.buy_order.append(limit_order)
-                    else:
-                        is_exist = 0
-                        for s in pos.sell_order:
-                            if s.oid == oid:
-                                is_exist=1
-                        if is_exist == 0:
-                            pos.sell_order.append(limit_order)
-
-    def position_fills(self, trader: Trader, last_upd):
-        url = "https://api.hyperliquid.xyz/info"
-        payload = {
+                    ))
+
+        # whatever is not in the snapshot was filled or cancelled
+        for pos in trader.positions.values():
+            for oid in [oid for oid in pos.buy_order if oid not in seen]:
+                pos.remove_order(oid)
+            for oid in [oid for oid in pos.sell_order if oid not in seen]:
+                pos.remove_order(oid)
+            if pos.tp is not None and pos.tp.oid not in seen:
+                pos.tp = None
+            if pos.sl is not None and pos.sl.oid not in seen:
+                pos.sl = None
+            pos.market = ()
+
+        if events and self.order_sink is not None:
+            self.order_sink(trader, events)
+
+    def fills_payload(self, trader: Trader, start_ms: int) -> Dict:
+        # no endTime: the server clock decides what "now" is
+        return {
             "type": "userFillsByTime",
             "user": trader.address,
-            "startTime": int(last_upd) * 1000, 
-            "endTime": int(time.time()) * 1000,
+            "startTime": int(start_ms),
             "aggregateByTime": True
         }
 
-        try:
-            resp = requests.post(url, json=payload, timeout=10)
-            data = resp.json()
-        except Exception as e:
-            print(f"Error loading fills for {trader.address}: {e}")
-            return []
+    def next_fills_page(self, payload: Dict, data) -> Optional[Dict]:
+        """Payload for the following page of userFillsByTime, or None once caught up."""
+        if not isinstance(data, list) or len(data) < self.FILLS_PAGE_LIMIT:
+            return None
+        last = max(int(item.get("time", 0)) for item in data)
+        if last <= payload["startTime"]:
+            return None
+        # inclusive start: fills sharing `last` come back again and are dropped by tid
+        return dict(payload, startTime=last)
+
+    @staticmethod
+    def page_time(data) -> int:
+        """Newest fill time (ms) in a raw userFillsByTime page, spot fills included; 0 when empty."""
+        if not isinstance(data, list) or not data:
+            return 0
+        return max(int(item.get("time", 0)) for item in data)
+
+    def position_fills(self, trader: Trader, start_ms: int) -> Tuple[List[FillEvent], int]:
+        """
+        All perp fills since start_ms (inclusive), following pages until caught
+        up, plus the newest fill time seen on any page for FillWatermarks.advance.
+        """
+        payload = self.fills_payload(trader, start_ms)
+        events = []
+        last_time = 0
+
+        while payload is not None:
+            try:
+                resp = self.http.post(f"{self.base}/info", payload)
+                data = resp.json()
+            except Exception as e:
+                print(f"Error loading fills for {trader.address}: {e}")
+                break
+            events += self.parse_fills(trader, data)
+            last_time = max(last_time, self.page_time(data))
+            payload = self.next_fills_page(payload, data)
+
+        return events, last_time
 
+    def parse_fills(self, trader: Trader, data) -> List[FillEvent]:
+        """Convert a userFillsByTime response into perp FillEvents."""
         if not isinstance(data, list):
             print(f"Unexpected response for {trader.address}: {data}")
             return []
@@ -282,7 +434,7 @@ class HyperliquidAPI:
         for item in data:
 
             # --- фильтр: берем только perp ---
-            coin = item.get("coin", "")
+            coin = intern_coin(item.get("coin", ""))
             if coin.startswith("@"):
                 # это spot, пропускаем
                 continue
@@ -0,0 +1,183 @@
+# -----------------------------
+# Leaderboard Cache (streaming parse + conditional GET) and columnar index
+# -----------------------------
+from typing import List, Optional
+import json
+import os
+import time
+import numpy as np
+
+try:
+    import ijson  # optional: incremental parse, the full document never sits in memory
+except ImportError:
+    ijson = None
+
+FRAMES = ("day", "week", "month", "allTime")
+FIELDS = ("pnl", "roi", "vlm")
+
+
+def compact_row(row: dict) -> Optional[list]:
+    """
+    Reduce a leaderboardRows item to [address, name, pnl/roi/vlm x FRAMES].
+    Numbers stay in FRAMES x FIELDS order so a row is 14 flat values.
+    """
+    address = row.get("ethAddress", "")
+    if not address:
+        return None
+    values = [0.0] * (len(FRAMES) * len(FIELDS))
+    for frame, perf in row.get("windowPerformances", []):
+        if frame not in FRAMES:
+            continue
+        base = FRAMES.index(frame) * len(FIELDS)
+        for i, key in enumerate(FIELDS):
+            values[base + i] = float(perf.get(key, 0) or 0)
+    return [address, row.get("displayName") or ""] + values
+
+
+class LeaderboardCache:
+    """
+    Keeps the compact leaderboard on disk (LEADERBOARD_CACHE) together with the
+    response validators. Within LEADERBOARD_TTL seconds nothing is requested;
+    after that a conditional GET is sent and a 304 just renews the timestamp.
+    """
+    def __init__(self, config, http):
+        self.cfg = config
+        self.http = http
+        self.path = config.leaderboard_cache_path
+        self.rows: List[list] = []
+        self.etag = None
+        self.last_modified = None
+        self.fetched_at = 0.0
+        self.version = 0  # bumped whenever rows change
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self.rows = data.get("rows", [])
+            self.etag = data.get("etag")
+            self.last_modified = data.get("last_modified")
+            self.fetched_at = float(data.get("fetched_at", 0))
+            self.version += 1
+        except Exception as e:
+            print(f"Leaderboard cache unreadable, ignoring: {e}")
+
+    def _save(self):
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({
+                "etag": self.etag,
+                "last_modified": self.last_modified,
+                "fetched_at": self.fetched_at,
+                "rows": self.rows,
+            }, f, ensure_ascii=False)
+        os.replace(tmp, self.path)
+
+    def get(self, url: str, force: bool = False) -> List[list]:
+        """Compact rows, downloading only when the TTL expired and the source changed."""
+        if not force and self.rows and time.time() - self.fetched_at < self.cfg.leaderboard_ttl:
+            return self.rows
+
+        headers = {}
+        if self.rows:
+            if self.etag:
+                headers["If-None-Match"] = self.etag
+            if self.last_modified:
+                headers["If-Modified-Since"] = self.last_modified
+
+        started = time.perf_counter()
+        with self.http.stream(url, "leaderboard", headers=headers) as resp:
+            if resp.status_code == 304:
+                self.fetched_at = time.time()
+                self._save()
+                print(f"leaderboard not modified ({len(self.rows)} rows cached)")
+                return self.rows
+            if resp.status_code != 200:
+                resp.read()
+                print(f"ERROR: {resp.text[:100]}...")
+                return self.rows
+
+            rows = self._parse(resp)
+            self.etag = resp.headers.get("ETag")
+            self.last_modified = resp.headers.get("Last-Modified")
+
+        self.rows = rows
+        self.fetched_at = time.time()
+        self.version += 1
+        self._save()
+        print(f"leaderboard downloaded: {len(rows)} rows in {time.perf_counter() - started:.2f}s")
+        return self.rows
+
+    @staticmethod
+    def _parse(resp) -> List[list]:
+        rows = []
+
+        def keep(row):
+            try:
+                r = compact_row(row)
+                if r is not None:
+                    rows.append(r)
+            except (KeyError, ValueError, TypeError) as e:
+                print(f"Parse error for {row.get('ethAddress', 'unknown')}: {e}")
+
+        if ijson is None:
+            for row in json.loads(resp.read()).get("leaderboardRows", []):
+                keep(row)
+            return rows
+
+        items = ijson.sendable_list()
+        coro = ijson.items_coro(items, "leaderboardRows.item")
+        for chunk in resp.iter_bytes():
+            coro.send(chunk)
+            for row in items:
+                keep(row)
+            del items[:]
+        coro.close()
+        for row in items:
+            keep(row)
+        return rows
+
+
+class LeaderboardIndex:
+    """
+    Columnar copy of the cached rows: address/name arrays plus pnl, roi and
+    vlm matrices shaped (len(FRAMES), n). Any threshold/sort combination is a
+    couple of vectorized ops, so re-filtering never touches the network.
+    Rebuilt only when the cache version changes.
+    """
+    SORT_KEYS = ("pnl", "roi", "volume")
+
+    def __init__(self):
+        self.version = None
+        self.address = np.empty(0, dtype=object)
+        self.name = np.empty(0, dtype=object)
+        self.pnl = np.zeros((len(FRAMES), 0))
+        self.roi = np.zeros((len(FRAMES), 0))
+        self.vlm = np.zeros((len(FRAMES), 0))
+
+    def __len__(self):
+        return len(self.address)
+
+    def build(self, rows: List[list], version: int):
+        n = len(rows)
+        self.address = np.array([r[0] for r in rows], dtype=object)
+        self.name = np.array([r[1] for r in rows], dtype=object)
+        values = np.array([r[2:] for r in rows], dtype=np.float64).reshape(n, len(FRAMES), len(FIELDS))
+        self.pnl = np.ascontiguousarray(values[:, :, 0].T)
+        self.roi = np.ascontiguousarray(values[:, :, 1].T) * 100  # percent, like the rest of the bot
+        self.vlm = np.ascontiguousarray(values[:, :, 2].T)
+        self.version = version
+
+    def select(self, timeframe: str, pnl_min: float, roi_min: float, limit: int,
+               sort_by: str = "pnl") -> np.ndarray:
+        """Row indices passing both floors, best `limit` first by sort_by."""
+        f = FRAMES.index(timeframe)
+        idx = np.flatnonzero((self.pnl[f] >= pnl_min) & (self.roi[f] >= roi_min))
+        key = {"pnl": self.pnl, "roi": self.roi, "volume": self.vlm}.get(sort_by, self.pnl)[f][idx]
+        if len(idx) > limit:
+            top = np.argpartition(-key, limit - 1)[:limit]
+            idx, key = idx[top], key[top]
+        return idx[np.argsort(-key, kind="stable")]
@@ -0,0 +1,72 @@
+# -----------------------------
+# Event-sourced Position Ledger
+# -----------------------------
+from models import Trader, Position, FillEvent
+from typing import List
+import math
+
+
+class PositionLedger:
+    """
+    Folds FillEvents into Position state: signed size, VWAP entry, realized PnL
+    and flips. Every fill carries the size it started from, so the fold is
+    anchored to the exchange's own numbers and replaying a fill twice does not
+    move the size. clearinghouseState is only taken as an occasional checkpoint;
+    check() counts and prints any disagreement with the folded state.
+    """
+    SIZE_EPS = 1e-9
+    ENTRY_EPS = 1e-3  # relative
+
+    def __init__(self):
+        self.folded = 0
+        self.checkpoints = 0
+        self.drifts = 0
+
+    def apply(self, pos: Position, ev: FillEvent):
+        old = ev.start_position
+        delta = ev.size if ev.side == "B" else -ev.size
+        new = round(old + delta, 10)
+
+        if old == 0:
+            # a fresh open: PnL realized by an earlier position on this coin is not carried over
+            pos.realized_pnl = 0.0
+        if new == 0:
+            pos.size = 0.0
+            pos.is_long = None
+            pos.leverage = 0
+            pos.position_value = 0.0
+            pos.entry = 0.0
+            pos.unpnl = 0.0
+            pos.liquidation_px = pos.margin_used = 0.0
+        else:
+            if old == 0 or (old > 0) != (new > 0) or not pos.entry:
+                # open, flip, or nothing known about the entry yet
+                pos.entry = ev.price
+                # the old liquidation price belongs to the other side; NaN asks for a reload
+                pos.liquidation_px = math.nan
+            elif abs(new) > abs(old):
+                pos.entry = (pos.entry * abs(old) + ev.price * ev.size) / abs(new)
+            pos.size = new
+            pos.is_long = new > 0
+            pos.position_value = abs(new) * ev.price
+            pos.unpnl = (ev.price - pos.entry) * new
+        pos.realized_pnl += ev.closedPnl
+        pos.is_mod = True
+        self.folded += 1
+
+    def apply_fills(self, trader: Trader, events: List[FillEvent]):
+        for ev in sorted(events, key=lambda e: (e.time, e.tid)):
+            # streamed fills can arrive before clearinghouseState knows the coin
+            pos = trader.positions.setdefault(ev.coin, Position(is_long=None))
+            self.apply(pos, ev)
+
+    def check(self, address: str, coin: str, pos: Position, size: float, entry: float) -> bool:
+        """Compare folded state with a checkpoint; True when they agree."""
+        self.checkpoints += 1
+        size_off = abs(pos.size - size) > self.SIZE_EPS * max(1.0, abs(size))
+        entry_off = bool(size and entry and pos.entry) and abs(pos.entry - entry) / entry > self.ENTRY_EPS
+        if size_off or entry_off:
+            self.drifts += 1
+            print(f"ledger drift {address[:8]} {coin}: size {pos.size} vs {size}, entry {pos.entry} vs {entry}")
+            return False
+        return True
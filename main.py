@@ -3,43 +3,86 @@
 import time
 from config import Config
 from telebot import TeleBot
-from telebot.apihelper import ApiTelegramException
 from typing import List, Dict, Optional
-from models import Position, Trader
+from models import Position, Trader, OrderEvent
 from hyperliquid import HyperliquidAPI
+from poller import AsyncPoller
+from streamer import FillStreamer
+from sharding import ShardCoordinator
+from subscriptions import Subscription, SubscriptionIndex
+from bigfills import BigFillDetector
+from scheduler import PollScheduler
+from store import StateStore
+from watermarks import FillWatermarks
+from coalescer import FillCoalescer, merge_fills
+from cards import CardDebouncer
+from charts import ChartRenderer, render_longshort, render_volume
+from dispatcher import TelegramDispatcher, PRIORITY_ALERT, PRIORITY_NORMAL, PRIORITY_BULK
 from datetime import datetime, timezone, timedelta
 import shlex
-import matplotlib.pyplot as plt
-from io import BytesIO
+import functools
+import json
 import threading
 import queue
 # -----------------------------
 # Event Processor
 # -----------------------------
 class EventMonitor(threading.Thread):
-    def __init__(self, api: HyperliquidAPI, bot: TeleBot, config):
+    def __init__(self, api: HyperliquidAPI, dispatcher: TelegramDispatcher, config, store: StateStore = None,
+                 subscriptions: SubscriptionIndex = None):
         self.api = api
-        self.position_messages = {}  
-        self.bot = bot
+        self.subscriptions = subscriptions if subscriptions is not None else SubscriptionIndex()
+        self.big_fills = BigFillDetector(config)
+        self.store = store
+        self.position_messages = store.load_messages() if store is not None else {}
+        self.dispatcher = dispatcher
         self.cfg = config
+        self.cards = CardDebouncer(config.card_edit_interval)
+        self.card_events = {}  # (address, coin) -> last FillEvent shown on the card
         self.queue = queue.Queue()
         super().__init__(daemon=True)
 
     def push_event(self, trader, event_list):
         self.queue.put((trader, event_list))
 
+    def remember_message(self, address, coin, message_id):
+        self.position_messages[(address, coin)] = message_id
+        self.cards.touched((address, coin))
+        if self.store is not None:
+            self.store.save_message(address, coin, message_id)
+
     def run(self):
+        coalescer = FillCoalescer(self.cfg.fill_coalesce_window)
         while True:
-            trader, event_list = self.queue.get()
+            timeouts = [t for t in (coalescer.next_timeout(), self.cards.next_timeout()) if t is not None]
             try:
-                # отправка данных
-                time.sleep(2)
-                self.notify_fills(trader, event_list)
+                trader, event_list = self.queue.get(timeout=min(timeouts) if timeouts else None)
+                order_events = [e for e in event_list if isinstance(e, OrderEvent)]
+                fills = [e for e in event_list if not isinstance(e, OrderEvent)]
+                coalescer.add(trader, fills)
+                self.queue.task_done()
+                # scored per raw fill, before coalescing merges them
+                big = self.big_fills.observe(trader, fills)
+                if big and self.cfg.big_fill_alerts:
+                    self.notify_big_fills(big)
+                if order_events:
+                    self.notify_orders(trader, order_events)
+            except queue.Empty:
+                pass
             except Exception as e:
                 print("SenderThread error:", e)
 
-            finally:
-                self.queue.task_done()
+            for trader, event_list in coalescer.due():
+                try:
+                    self.notify_fills(trader, event_list)
+                except Exception as e:
+                    print("SenderThread error:", e)
+
+            for trader, coin in self.cards.due():
+                try:
+                    self.edit_card(trader, coin)
+                except Exception as e:
+                    print("Card edit error:", e)
                 
     @staticmethod
     def get_wallet_name(trader_address, trader_name):
@@ -78,12 +121,15 @@ class EventMonitor(threading.Thread):
             percents =  ev.size*100/ev.start_position
         else:
             percents = 0
+        price_label = "VWAP" if ev.fills > 1 else "Price"
         page = (
-            f"{arrow} *{action}* `#{ev.coin}` 💵 *Price*: `${ev.price}`\n"
+            f"{arrow} *{action}* `#{ev.coin}` 💵 *{price_label}*: `${ev.price}`\n"
             f"📏 *Size/PrevSize*: `{ev.size}`/ {ev.start_position} (#{ev.coin})\n"
             f"📊 *Percent Change*: `{percents:.1f}` %\n"
-            f"💰 *Closed PnL*: `${ev.closedPnl}`\n"
+            f"💰 *Closed PnL*: `${ev.closedPnl:.2f}`\n"
         )  
+        if ev.fills > 1:
+            page += f"🧩 *Fills*: `{ev.fills}`\n"
         # time
         dt = datetime.fromtimestamp(ev.time / 1000).strftime("%Y-%m-%d %H:%M:%S")
         page += f"\n⏱ *Time:* `{dt}`\n"
@@ -96,17 +142,21 @@ class EventMonitor(threading.Thread):
         main_info = (
             f"📢 *ACTIVE POSITION*\n"
             f"📈 {self.get_direction(pos)} `#{coin}` `{leverage}`\n"
-            f"💰 Size: {pos.size} #{coin} ($`{pos.position_value}`) \n"
-            f"⚡ Entry Price: {pos.entry} *UnPNL:* ${pos.unpnl:.1f} \n"               
+            f"💰 Size: {pos.size} #{coin} ($`{pos.position_value:,.2f}`) \n"
+            f"⚡ Entry Price: {pos.entry:.6g} *UnPNL:* ${pos.unpnl:.1f} \n"               
         )
+        if pos.realized_pnl:
+            main_info += f"💵 Realized PnL: ${pos.realized_pnl:.2f}\n"
+        if pos.liquidation_px > 0:
+            main_info += f"☠️ Liq. Price: {pos.liquidation_px:.6g}\n"
         
         page = main_info + f"📢 *LIMIT ORDERS*\n"
-        for order in pos.buy_order:
+        for order in list(pos.buy_order.values()):
             act = "ENTER"
             if order.action == "output":
                 act = "EXIT"
             page += f"🟢 POS {act}: ${order.limit} VOL:({order.remain_size}/{order.size}) `#{coin}`\n"
-        for order in pos.sell_order:
+        for order in list(pos.sell_order.values()):
             act = "ENTER"
             if order.action == "output":
                 act = "EXIT"
@@ -126,8 +176,11 @@ class EventMonitor(threading.Thread):
         if len(trader.positions) == 0:
             return
         
+        # background refreshes add and drop coins while we render
+        self.api.position_table.mark_trader(trader)
+        positions = list(trader.positions.items())
         find_mut = 0
-        for pos in trader.positions.values():
+        for _, pos in positions:
             if pos.is_mod == True:
                 find_mut = 1
         if find_mut == 0:
@@ -136,116 +189,163 @@ class EventMonitor(threading.Thread):
         trader_info = (
             f"👤 {self.get_wallet_name(trader.address, trader.name)} 💰 Trader ROI & PnL: `{trader.roi:.1f}% ${trader.pnl:.1f}`"
         )
-        try:
-            self.bot.send_message(self.cfg.chat_id, trader_info, parse_mode="Markdown")
-            time.sleep(2)
-        except ApiTelegramException as e:
-            if e.result_json and e.result_json.get("error_code") == 429:
-                retry_after = e.result_json.get("parameters", {}).get("retry_after", 1)
-                print(f"Rate limit hit, sleeping for {retry_after} seconds")
-                time.sleep(retry_after)
-                self.bot.send_message(self.cfg.chat_id, trader_info, parse_mode="Markdown")
-        for coin in trader.positions.keys():
-            pos = trader.positions[coin] 
+        self.dispatcher.send(self.cfg.chat_id, trader_info, PRIORITY_BULK)
+        for coin, pos in positions:
             # if pos.is_mod == 0:
             #     continue
             if only_waits and pos.is_long is not None:
                 continue
 
             page = self.position_print(pos, coin)
-            
-            try:
-                sent = self.bot.send_message(self.cfg.chat_id, page, parse_mode="Markdown")
-                self.position_messages[ (trader.address, coin) ] = sent.message_id
-                time.sleep(5)
-            except ApiTelegramException as e:
-                if e.result_json and e.result_json.get("error_code") == 429:
-                    retry_after = e.result_json.get("parameters", {}).get("retry_after", 1)
-                    print(f"Rate limit hit, sleeping for {retry_after} seconds")
-                    time.sleep(retry_after)
-                    self.bot.send_message(self.cfg.chat_id, page, parse_mode="Markdown")
+            self.dispatcher.send(self.cfg.chat_id, page, PRIORITY_BULK,
+                                 on_sent=self._remember_sent(trader.address, coin))
 
-    def notify_fills(self, trader, events):
-        trader_info = (
-            f"👤 {self.get_wallet_name(trader.address, trader.name)} 💰 Trader ROI & PnL: `{trader.roi:.1f}% ${trader.pnl:.1f}`"
+    def _remember_sent(self, address, coin):
+        return lambda sent: self.remember_message(address, coin, sent.message_id)
+
+    def trader_line(self, trader):
+        return (
+            f"👤 {self.get_wallet_name(trader.address, trader.name)} 💰 Trader ROI & PnL: `{trader.roi:.1f}% ${trader.pnl:.1f}`\n"
         )
-        try:
-            self.bot.send_message(self.cfg.chat_id, trader_info, parse_mode="Markdown")
-            time.sleep(2)
-        except ApiTelegramException as e:
-            if e.result_json and e.result_json.get("error_code") == 429:
-                retry_after = e.result_json.get("parameters", {}).get("retry_after", 1)
-                print(f"Rate limit hit, sleeping for {retry_after} seconds")
-                time.sleep(retry_after)
-                self.bot.send_message(self.cfg.chat_id, trader_info, parse_mode="Markdown")
-        
-        for event in events:
-            coin = event.coin
-            pos = trader.positions[coin]
-            self.api.position_update_local(pos,event)
 
-            reply_to = self.position_messages.get( (trader.address, coin), None)
-            msg = ""    
+    def edit_card(self, trader, coin):
+        """Re-render the live card of a position in place."""
+        key = (trader.address, coin)
+        pos = trader.positions.get(coin)
+        if pos is None or key not in self.position_messages:
+            return
+        self.api.position_table.mark_trader(trader)
+        page = self.trader_line(trader) + "*LIVE POSITION*\n"
+        event = self.card_events.get(key)
+        if event is not None:
+            page += self.event_print(event, pos)
+        page += self.position_print(pos, coin)
+        self.dispatcher.edit(self.cfg.chat_id, lambda key=key: self.position_messages.get(key), page,
+                             PRIORITY_ALERT, disable_web_page_preview=True)
+
+    def notify_fills(self, trader, events):
+        """
+        Opens and closes post a new message; anything in between only marks the
+        position card dirty, and it is edited at most once per CARD_EDIT_INTERVAL.
+        """
+        trader_info = self.trader_line(trader)
+        self.api.position_table.mark_trader(trader)
+
+        groups = {}
+        for event in events:
+            groups.setdefault((event.coin, event.direction), []).append(event)
+
+        for (coin, _), group in groups.items():
+            # the fills were already folded into the position when they were accepted; a coin a
+            # checkpoint dropped since renders as closed and is not put back from this thread
+            pos = trader.positions.get(coin)
+            if pos is None:
+                pos = Position(is_long=None)
+            event = merge_fills(group)
+
+            key = (trader.address, coin)
+            self.card_events[key] = event
             page = self.position_print(pos, coin )
-            
-            event_page = "*UPDATE POSITION!*\n"+ self.event_print(event,pos) 
-            if pos.is_long is None:
-                event_page = "*POSITION CLOSED!*\n" + self.event_print(event,pos) 
 
-            if reply_to is None or event.start_position == 0:
-                try:
-                    event_page = "*OPENED NEW POSITION!*\n" + self.event_print(event,pos) 
-                    msg = event_page + page
-                    sent = self.bot.send_message(self.cfg.chat_id, msg, parse_mode="Markdown")
-                    self.position_messages[ (trader.address, coin) ] = sent.message_id
-                except ApiTelegramException as e:
-                    if e.result_json and e.result_json.get("error_code") == 429:
-                        retry_after = e.result_json.get("parameters", {}).get("retry_after", 1)
-                        print(f"Rate limit hit, sleeping for {retry_after} seconds")
-                        time.sleep(retry_after)
-                        self.bot.send_message(self.cfg.chat_id, msg, parse_mode="Markdown")
+            # pos may already include later fills; the digest alone says what it did
+            end_position = round(event.start_position + (event.size if event.side == "B" else -event.size), 8)
+            if end_position == 0:
+                event_page = "*POSITION CLOSED!*\n" + self.event_print(event,pos) 
+                # resolved at send time, after any earlier message for this position went out
+                self.dispatcher.send(self.cfg.chat_id, trader_info + event_page + page, PRIORITY_ALERT,
+                                     reply_to=lambda key=key: self.position_messages.get(key))
+                self.edit_card(trader, coin)
+                self.cards.touched(key)
+            elif key not in self.position_messages or event.start_position == 0:
+                event_page = "*OPENED NEW POSITION!*\n" + self.event_print(event,pos) 
+                self.dispatcher.send(self.cfg.chat_id, trader_info + event_page + page, PRIORITY_ALERT,
+                                     on_sent=self._remember_sent(trader.address, coin))
             else:
-                #Position update    
-                try:
-                    msg = event_page + page
-                    self.bot.send_message(self.cfg.chat_id, msg, parse_mode="Markdown", reply_to_message_id=reply_to)
-                except ApiTelegramException as e:
-                    if e.result_json and e.result_json.get("error_code") == 429:
-                        retry_after = e.result_json.get("parameters", {}).get("retry_after", 1 )
-                        print(f"Rate limit hit, sleeping for {retry_after} seconds")
-                        time.sleep(retry_after)
-                        self.bot.send_message(self.cfg.chat_id, msg, parse_mode="Markdown", reply_to_message_id=reply_to)
-            time.sleep(4)
+                #Position update: the card catches up on its next debounced edit
+                self.cards.mark(trader, coin)
+
+            self.route_to_subscribers(trader, event, pos)
+
+    def route_to_subscribers(self, trader, event, pos):
+        """Copy of the digest for every subscribed chat whose filters accept it."""
+        chats = [c for c in self.subscriptions.match(trader, event) if str(c) != str(self.cfg.chat_id)]
+        if not chats:
+            return
+        page = self.trader_line(trader) + self.event_print(event, pos)
+        for chat_id in chats:
+            self.dispatcher.send(chat_id, page, PRIORITY_ALERT, disable_web_page_preview=True)
+
+    def order_event_print(self, ev):
+        side = "🟢 BUY" if ev.side == "B" else "🔴 SELL"
+        kind = "TP/SL" if ev.is_tpsl else ("EXIT" if ev.reduce_only else "ENTER")
+        if ev.kind == "placed":
+            return f"🆕 *PLACED* {side} {kind} `#{ev.coin}` ${ev.price} VOL: {ev.size}\n"
+        if ev.kind == "cancelled":
+            return f"❌ *CANCELLED/FILLED* {side} {kind} `#{ev.coin}` ${ev.price} VOL: {ev.size}\n"
+        if ev.kind == "resized":
+            return f"📏 *SIZE* {side} {kind} `#{ev.coin}` ${ev.price} VOL: {ev.prev_size} → {ev.size}\n"
+        if ev.kind == "tpsl_moved":
+            return f"🎯 *TP/SL MOVED* {side} `#{ev.coin}` ${ev.prev_price} → ${ev.price} VOL: {ev.size}\n"
+        return f"✏️ *MOVED* {side} {kind} `#{ev.coin}` ${ev.prev_price} → ${ev.price} VOL: {ev.size}\n"
+
+    def notify_orders(self, trader, events):
+        """One message per order-book diff of a trader."""
+        page = self.trader_line(trader) + "📢 *ORDER CHANGES*\n"
+        for ev in events:
+            page += self.order_event_print(ev)
+        self.dispatcher.send(self.cfg.chat_id, page, PRIORITY_NORMAL, disable_web_page_preview=True)
+
+    def big_fill_print(self, hit):
+        ev = hit.event
+        arrow = "🟢" if ev.side == "B" else "🔴"
+        dt = datetime.fromtimestamp(ev.time / 1000).strftime("%m-%d %H:%M:%S")
+        return (
+            f"{arrow} `#{ev.coin}` {ev.direction} *${hit.notional:,.0f}* @ ${ev.price} "
+            f"(p{hit.percentile:.0f}, z {hit.zscore:.1f}) `{dt}`\n"
+            f"👤 {self.get_wallet_name(hit.address, hit.trader_name)}\n"
+        )
+
+    def notify_big_fills(self, hits):
+        page = "🐋 *BIG FILL*\n" + "".join(self.big_fill_print(h) for h in hits)
+        self.dispatcher.send(self.cfg.chat_id, page, PRIORITY_ALERT, disable_web_page_preview=True)
+
+    def liquidation_print(self, hit):
+        direction = "LONG" if hit.size > 0 else "SHORT"
+        return (
+            f"{self.trader_line(hit.trader)}"
+            f"📉 {direction} `#{hit.coin}` {abs(hit.size)} — within {hit.level:g}% of liquidation\n"
+            f"Mid: {hit.mid:.6g} Liq: {hit.liquidation_px:.6g} (*{hit.distance:.2f}%* away)"
+            f" Margin: ${hit.margin_used:,.0f}\n"
+        )
+
+    def notify_liquidations(self, hits):
+        page = "⚠️ *LIQUIDATION RISK*\n" + "\n".join(self.liquidation_print(h) for h in hits)
+        self.dispatcher.send(self.cfg.chat_id, page, PRIORITY_ALERT, disable_web_page_preview=True)
 
     def notify_leader_trades(self, traders):
         if not traders:
             msg = (
                 f"Traders with PnL > {self.cfg.pnl_min} USD not found"
             )
-            self.bot.send_message(self.cfg.chat_id, msg, parse_mode="Markdown")
+            self.dispatcher.send(self.cfg.chat_id, msg, PRIORITY_BULK)
             return
         
         
         MAX_LEN = 4000  # оставляем немного запас
 
-        # сортировка: по PnL (убывание)
-        traders_sorted = sorted(traders, key=lambda t: t.pnl, reverse=True)
+        # get_leaderboard already returns them ordered by SORT_BY
+        traders_sorted = traders
 
         head = ["🏆 *Top Traders Update*\n"]
         head.append(f"Found {len(traders)} traders matching criteria (`PnL ≥ {self.cfg.pnl_min} USD and ROI ≥ {self.cfg.min_roi:.1f} %`)")
-        head.append(f"Period : {self.cfg.period}")
+        head.append(f"Period : {self.cfg.period}, sorted by {self.cfg.sort_by}")
         head_msg = '\n'.join(head)
-        self.bot.send_message(
-                self.cfg.chat_id,
-                head_msg,
-                parse_mode="Markdown"
-            )
-        time.sleep(5)
+        self.dispatcher.send(self.cfg.chat_id, head_msg, PRIORITY_BULK)
         lines = []
         for t in traders_sorted:
             # total_size = sum(p.size for p in t.positions) if t.positions else 0
             lines.append(
-                f"👤 {self.get_wallet_name(t.address, t.name)}\n💰 *PnL:* {t.pnl:.1f} USD 🎯 *ROI:* {t.roi:.1f}% \n"
+                f"👤 {self.get_wallet_name(t.address, t.name)}\n💰 *PnL:* {t.pnl:.1f} USD 🎯 *ROI:* {t.roi:.1f}% 📊 *Vol:* {t.volume or 0:,.0f} USD\n"
             )
         msg_blocks = []
         current_block = ""
@@ -260,46 +360,183 @@ class EventMonitor(threading.Thread):
 
         # отправка всех блоков
         for block in msg_blocks:
-            try:
-                self.bot.send_message(
-                    self.cfg.chat_id,
-                    block,
-                    parse_mode="Markdown"
-                )
-            except ApiTelegramException as e:
-                if e.result_json and e.result_json.get("error_code") == 429:
-                    retry_after = e.result_json.get("parameters", {}).get("retry_after", 1)
-                    print(f"Rate limit hit, sleeping for {retry_after} seconds")
-                    time.sleep(retry_after)
-                    self.bot.send_message(self.cfg.chat_id, block, parse_mode="Markdown")
-            time.sleep(5)
+            self.dispatcher.send(self.cfg.chat_id, block, PRIORITY_BULK)
 
 class BotController:
+    REFRESH_TIMEOUT = 300  # seconds /refresh waits for the new traders to load before rendering
 
     def __init__(self):
+        self.started = time.time()
+        self.phase = "starting"
+        self.ready = False
+        self.ready_after = None     # seconds from start until traders were hydrated
+        self.serving_after = None   # seconds from start until Telegram polling began
+        self.first_latency = None   # seconds from sending the first command after start to its answer
         self.config = Config()
         self.api = HyperliquidAPI(self.config)
+        self.poller = AsyncPoller(self.api, self.config)
+        self.scheduler = PollScheduler(self.config)
+        self.store = StateStore(self.config.state_db)
         self.bot = TeleBot(self.config.token, parse_mode="Markdown")
-        self.monitor = EventMonitor(self.api, self.bot, self.config)
+        self.dispatcher = TelegramDispatcher(self.bot, self.config)
+        self.dispatcher.start()
+        self.subscriptions = SubscriptionIndex()
+        self.subscriptions.load(self.store.load_subscriptions())
+        self.monitor = EventMonitor(self.api, self.dispatcher, self.config, self.store, self.subscriptions)
         self.monitor.start()
-
-        self.bot.send_message(self.config.chat_id, "🔄 loading datasets from Hyperliquid...", parse_mode="Markdown")
-
-        self.traders = self.api.get_leaderboard(timeframe=self.config.period)
-        # self.monitor.notify_leader_trades(self.traders)
-
-        self.last_trader_load = {}
-        for trader in self.traders:
-            self.api.position_update(trader)
-            self.api.load_limit_orders(trader)
-            self.last_trader_load[trader.address] = time.time()
-            # self.monitor.notify_active_position_info(trader)
-
-        self.bot.send_message(self.config.chat_id, "🤖 Bot ready! send /help for see avail commands", parse_mode="Markdown")
-        threading.Thread(target=self.run, daemon=True).start()
+        self.charts = ChartRenderer(self.config)
+        # order-book diffs share the fill queue, whichever path loaded the orders
+        self.api.order_sink = self.monitor.push_event
+        self.api.liquidation_sink = self.monitor.notify_liquidations
+        self.api.reload_sink = self.reload
+
+        self.watermarks = FillWatermarks()
+        self.traders = []
+        self.streamer = None
+        self.shards = None
+
+        # commands are answered right away; traders load in the background (see /status)
         self.register_handlers()
+        threading.Thread(target=self.warm_up, daemon=True).start()
+        self.serving_after = time.time() - self.started
+        self.track_startup("serving_s", self.serving_after)
+        print(f"serving commands {self.serving_after:.2f}s after start")
         self.bot.infinity_polling()
 
+    def warm_up(self):
+        """Load the tracked traders, then start polling/streaming and persistence."""
+        try:
+            self.phase = "restoring"
+            traders = self.store.load_traders(self.filters_key())
+            if traders:
+                # warm restart: the poller backfills fills since each watermark
+                self.store.load_watermarks(self.watermarks)
+                for trader in traders:
+                    self.watermarks.start(trader.address)
+                    self.api.positions_changed(trader)
+                self.traders = traders
+                print(f"restored {len(traders)} traders from {self.config.state_db}")
+            else:
+                self.dispatcher.send(self.config.chat_id, "🔄 loading datasets from Hyperliquid...", PRIORITY_NORMAL)
+                self.phase = "leaderboard"
+                traders = self.api.get_leaderboard(timeframe=self.config.period, sort_by=self.config.sort_by)
+                for trader in traders:
+                    self.watermarks.start(trader.address)
+                # visible to commands while positions hydrate
+                self.traders = traders
+                self.phase = "hydrating"
+                self.poller.refresh(traders).result()
+                self.store.save_traders(traders, self.filters_key())
+                self.store.save_state(traders, self.watermarks)
+        except Exception as e:
+            print(f"Warm-up failed: {e}")
+        finally:
+            self.ready_after = time.time() - self.started
+            self.ready = True
+            self.phase = "running"
+            self.track_startup("ready_s", self.ready_after)
+
+        print(f"warm-up finished in {self.ready_after:.1f}s ({len(self.traders)} traders)")
+        self.dispatcher.send(self.config.chat_id, "🤖 Bot ready! send /help for see avail commands", PRIORITY_NORMAL)
+        if self.config.streaming:
+            self.streamer = FillStreamer(self.api, self.config, self.monitor, self.watermarks)
+            self.streamer.set_traders(self.traders)
+            self.streamer.start()
+        elif self.config.shards > 0:
+            self.shards = ShardCoordinator(self.api, self.config, self.monitor, self.watermarks)
+            self.shards.start()
+            self.shards.set_traders(self.traders)
+        else:
+            threading.Thread(target=self.run, daemon=True).start()
+        if self.config.mids_interval > 0:
+            threading.Thread(target=self.mark_to_market, daemon=True).start()
+        threading.Thread(target=self.persist, daemon=True).start()
+
+    def command(self, *commands):
+        """bot.message_handler that also records how long the first command after start waited for its answer."""
+        def wrap(fn):
+            @functools.wraps(fn)
+            def handler(message):
+                try:
+                    return fn(message)
+                finally:
+                    if self.first_latency is None:
+                        # message.date is when the user sent it (whole seconds), not when we received it
+                        self.first_latency = max(0.0, time.time() - message.date)
+                        self.track_startup("first_latency_s", self.first_latency)
+                        print(f"first command answered {self.first_latency:.1f}s after it was sent")
+            return self.bot.message_handler(commands=list(commands))(handler)
+        return wrap
+
+    def track_startup(self, key: str, seconds: float, keep: int = 20):
+        """Append to a rolling history kept in the state store meta table."""
+        try:
+            history = json.loads(self.store.get_meta(key) or "[]")
+            history = (history + [round(seconds, 2)])[-keep:]
+            self.store.set_meta(key, json.dumps(history))
+        except Exception as e:
+            print(f"Startup metric not saved: {e}")
+
+    def refresh_stale(self) -> int:
+        """Kick off a background reload of traders older than SNAPSHOT_MAX_AGE; returns how many."""
+        now = time.time()
+        stale = [t for t in self.traders if now - t.updated_at > self.config.snapshot_max_age]
+        if stale:
+            self.reload(stale)
+        return len(stale)
+
+    def reload(self, traders):
+        """Background reload of positions and orders; with SHARDS the owning worker does it. Returns a Future."""
+        if self.shards is not None:
+            return self.shards.refresh(traders)
+        return self.poller.refresh(traders)
+
+    def refresh_traders(self, message):
+        """/refresh after the arguments were applied: runs off the telebot thread."""
+        try:
+            traders = self.api.get_leaderboard(timeframe=self.config.period, sort_by=self.config.sort_by)
+            self.monitor.notify_leader_trades(traders)
+
+            keep = [t.address for t in traders]
+            self.watermarks.retain(keep)
+            self.api.retain(keep)
+            for trader in traders:
+                self.watermarks.start(trader.address)
+            self.traders = traders
+            if self.shards is not None:
+                self.shards.set_traders(traders)
+            try:
+                # concurrent on the poller, or on the owning shards
+                self.reload(traders).result(timeout=self.REFRESH_TIMEOUT)
+            except Exception as e:
+                print(f"Refresh reload incomplete: {e}")
+            if self.streamer is not None:
+                self.streamer.set_traders(traders)
+
+            for trader in traders:
+                self.monitor.notify_active_position_info(trader)
+            self.store.save_traders(traders, self.filters_key())
+            self.store.save_state(traders, self.watermarks)
+            self.bot.reply_to(message, "✔ Traders refreshed")
+        except Exception as e:
+            print(f"Refresh failed: {e}")
+            self.bot.reply_to(message, f"❌ Refresh failed: {e}")
+
+    def snapshot_note(self, stale: int) -> str:
+        if not self.ready:
+            return f"⏳ warming up ({self.phase}), see /status"
+        if not self.traders:
+            return ""
+        oldest = time.time() - min(t.updated_at for t in self.traders)
+        note = f"🕒 oldest snapshot `{oldest:.0f}s`"
+        if stale:
+            note += f", {stale} traders refreshing in background"
+        return note
+
+    def filters_key(self) -> str:
+        """Identifies the leaderboard selection a stored trader set belongs to."""
+        return f"{self.config.period}|{self.config.pnl_min}|{self.config.min_roi}|{self.config.sort_by}"
+
     # --------------------------
     # Universal Argument Parser
     # --------------------------
@@ -331,6 +568,16 @@ class BotController:
         return args
 
 
+    def send_chart(self, chat_id, future, caption: str, fallback: str):
+        """Send the rendered chart once it is ready; plain text if rendering failed."""
+        def done(fut):
+            try:
+                self.dispatcher.send_photo(chat_id, fut.result(), caption, PRIORITY_NORMAL)
+            except Exception as e:
+                print(f"Chart render failed: {e}")
+                self.dispatcher.send(chat_id, fallback, PRIORITY_NORMAL)
+        future.add_done_callback(done)
+
     def text_bar(self, percent: float, size: int = 10) -> str:
 
         if percent < 0: percent = 0
@@ -346,22 +593,24 @@ class BotController:
 
     def register_handlers(self):
 
-        @self.bot.message_handler(commands=['active'])
+        @self.command('active')
         def active(message):
+            # answered from the in-memory snapshot, stale traders reload in the background
+            stale = self.refresh_stale()
+            self.bot.reply_to(message, f"📋 Active positions of {len(self.traders)} traders\n" + self.snapshot_note(stale))
             for trader in self.traders:
-                self.api.position_update(trader)
-                self.api.load_limit_orders(trader)
                 self.monitor.notify_active_position_info(trader)
 
-        @self.bot.message_handler(commands=['help'])
+        @self.command('help')
         def help_cmd(message):
             msg = (
                 "Available cmds:\n"
                 "💬 Update traders\n"
-                "/refresh --roi <value> --pnl <usd> --period <period>\n"
+                "/refresh --roi <value> --pnl <usd> --period <period> --sort <key>\n"
                 "  --roi / -r : minimal ROI %\n"
                 "  --pnl / -p : minimal PnL USD\n"
-                "  --per / -t : day/week/month/allTime\n\n"
+                "  --per / -t : day/week/month/allTime\n"
+                "  --sort / -s : pnl/roi/volume\n\n"
                 "💬 Print active positions of that trader set\n"
                 "/active\n\n"
                 "💬 Long vs Short overview\n"
@@ -374,12 +623,24 @@ class BotController:
                 "/sniper\n\n"
 
                 "💬 Big fills events\n"
-                "/events\n"
+                "/events --coin <coin>\n\n"
+
+                "💬 Poll scheduler queue\n"
+                "/schedule\n\n"
+
+                "💬 Fill alerts in this chat\n"
+                "/subscribe --coins BTC,ETH --min <usd> --dir long|short --pnl <usd> --roi <pct> --wallets 0x..,0x..\n"
+                "  every filter is optional; /subscription shows it, /unsubscribe stops it\n\n"
+
+                "💬 Startup and runtime status\n"
+                "/status\n"
             )
             self.bot.reply_to(message, msg)
 
-        @self.bot.message_handler(commands=['refresh'])
+        @self.command('refresh')
         def refresh(message):
+            if not self.ready:
+                return self.bot.reply_to(message, f"⏳ Still warming up ({self.phase}), try again after /status shows running")
             args = self.parse_args(message.text)
 
             step_valid = 0
@@ -411,56 +672,32 @@ class BotController:
                 if per in ("day", "week", "month", "allTime"):
                     self.config.set_attribute("PERIOD", per)
 
+            # SORT
+            sort_by = args.get("sort", args.get("s", "pnl"))
+            if sort_by in ("pnl", "roi", "volume"):
+                self.config.set_attribute("SORT_BY", sort_by)
+
             if step_valid != 2:
                 self.bot.reply_to(message,
-                    "/refresh --roi <value> --pnl <value> --period <period>")
+                    "/refresh --roi <value> --pnl <value> --period <period> --sort <pnl|roi|volume>")
                 return
 
             self.config._reload()
+            self.bot.reply_to(message, "🔄 Loading traders in the background...")
+            threading.Thread(target=self.refresh_traders, args=(message,), daemon=True).start()
 
-            self.traders = self.api.get_leaderboard(timeframe=self.config.period)
-            self.monitor.notify_leader_trades(self.traders)
-
-            self.last_trader_load = {}
-            for trader in self.traders:
-                self.api.position_update(trader)
-                self.api.load_limit_orders(trader)
-                self.last_trader_load[trader.address] = time.time()
-                self.monitor.notify_active_position_info(trader)
-
-            self.bot.reply_to(message, "✔ Traders refreshed")
-
-        @self.bot.message_handler(commands=['sniper'])
+        @self.command('sniper')
         def sniper(message):
-            self.bot.reply_to(message, "WAIT positions:")
+            stale = self.refresh_stale()
+            self.bot.reply_to(message, "WAIT positions:\n" + self.snapshot_note(stale))
             for trader in self.traders:
                 self.monitor.notify_active_position_info(trader, True)
 
-        @self.bot.message_handler(commands=['volume'])
+        @self.command('volume')
         def volume(message):
-            self.bot.reply_to(message, "📊 Volume calculation in progress…")
-            
-            btc_volume = 0.0
-            altcoin_volume = 0.0
-            coin_volumes = {}
-            
-            for trader in self.traders:
-                for coin, pos in trader.positions.items():
-                    if pos.is_long is None:
-                        continue
-                    
-                    # Use absolute position value (no leverage)
-                    pos_value = abs(pos.position_value)
-                    
-                    if coin not in coin_volumes:
-                        coin_volumes[coin] = 0.0
-                    coin_volumes[coin] += pos_value
-                    
-                    if coin == "BTC":
-                        btc_volume += pos_value
-                    else:
-                        altcoin_volume += pos_value
-            
+            # maintained incrementally by api.aggregates, no scan over traders
+            stale = self.refresh_stale()
+            version, _, _, btc_volume, altcoin_volume = self.api.aggregates.snapshot()
             total_volume = btc_volume + altcoin_volume
             
             if total_volume == 0:
@@ -478,14 +715,16 @@ class BotController:
             
             # Top 5 coins by volume
             response += "📈 *Top Coins by Volume:*\n"
-            sorted_coins = sorted(coin_volumes.items(), key=lambda x: x[1], reverse=True)[:5]
-            for i, (coin, vol) in enumerate(sorted_coins, 1):
+            top = self.api.aggregates.top_coins(10)
+            for i, (coin, vol) in enumerate(top[:5], 1):
                 coin_pct = vol / total_volume * 100
                 response += f"{i}. `#{coin}`: `${vol:,.0f}` ({coin_pct:.1f}%)\n"
-            
-            self.bot.reply_to(message, response, parse_mode="Markdown")
+            response += "\n" + self.snapshot_note(stale)
+
+            chart = self.charts.render(("volume",), version, render_volume, btc_volume, altcoin_volume, top)
+            self.send_chart(message.chat.id, chart, response, response)
 
-        @self.bot.message_handler(commands=['longshort'])
+        @self.command('longshort')
         def longshort(message):
             arg = self.parse_args(message.text)
 
@@ -495,84 +734,177 @@ class BotController:
             if "r" in arg:
                 value = int(arg["r"])
 
+            stale = self.refresh_stale()
+            # WAIT positions are not counted on either side
+            version, coins, total, _, _ = self.api.aggregates.snapshot()
             if value == 1:
                 self.bot.reply_to(message, "Long/Short calculation… (for each coin together)")
-                
-                com_longs  = 0
-                com_shorts = 0
-                
-                # Теперь правильно считаем позиции
-                for trader in self.traders:
-                    for coin in trader.positions.keys():
-                        pos = trader.positions[coin]
-                        if pos.is_long:
-                            com_longs += 1
-                        else:
-                            com_shorts += 1
-
-                total = com_longs + com_shorts
-
-                if total == 0:
-                    return self.bot.reply_to(message, "No positions")
 
-                longs_percent = com_longs/ total    # число 0..1
+                longs_percent = total.long_ratio()
+                if longs_percent is None:
+                    return self.bot.reply_to(message, "No positions")
 
-                resp = f"All crypto, Longs {int(longs_percent*100.0)} % / Short {int(100.0 - longs_percent*100)} %\n"
-                bar = self.text_bar(longs_percent)
-                resp += bar
+                resp = f"All crypto, Longs {int(longs_percent*100.0)} % / Short {int(100.0 - longs_percent*100)} % ({total.longs}/{total.shorts} positions)\n"
+                resp += self.text_bar(longs_percent)
+                weighted = total.long_ratio(weighted=True)
+                if weighted is not None:
+                    resp += f"\nBy notional: Longs {int(weighted*100.0)} % / Short {int(100.0 - weighted*100)} % (${total.long_notional:,.0f}/${total.short_notional:,.0f})\n"
+                    resp += self.text_bar(weighted)
+                resp += "\n" + self.snapshot_note(stale)
                 self.bot.send_message(message.chat.id, resp)
                 return
 
             self.bot.reply_to(message, "Long/Short calculation… (for each coin separately)")
-            temp_dict = {}
-
-            for trader in self.traders:
-                for coin, pos in trader.positions.items():
-
-                    if coin not in temp_dict:
-                        temp_dict[coin] = {"long": 0, "short": 0}
+            rows = [
+                (coin, st.longs, st.shorts, st.long_notional, st.short_notional)
+                for coin, st in sorted(coins.items(), key=lambda x: x[1].notional, reverse=True)
+            ]
+            if not rows:
+                return self.bot.reply_to(message, "No positions")
+
+            # one chart for every coin; the text version is only a fallback
+            lines = []
+            for coin, longs, shorts, long_notional, short_notional in rows:
+                long_ratio = longs / (longs + shorts)
+                lines.append(f"#{coin} Longs {int(long_ratio*100.0)} % / Shorts {int(100-long_ratio*100.0)} % ({longs}/{shorts})")
+            fallback = "\n".join(lines)[:4000] + "\n" + self.snapshot_note(stale)
+            caption = (
+                f"Long/Short by coin: {len(rows)} coins, longs {total.longs} / shorts {total.shorts}\n"
+                + self.snapshot_note(stale)
+            )
+            chart = self.charts.render(("longshort",), version, render_longshort, rows[:60])
+            self.send_chart(message.chat.id, chart, caption, fallback)
 
-                    if pos.is_long:
-                        temp_dict[coin]["long"] += 1
-                    else:
-                        temp_dict[coin]["short"] += 1
-            
-            for coin, data in temp_dict.items():
-                total = data["long"] + data["short"]
-                if total != 0:
-                    long_ratio = data["long"] / total
-                    resp = f"#{coin} Longs {int(long_ratio*100.0) } % / Shorts {int(100-long_ratio*100.0)} %\n"
-                    bar = self.text_bar(long_ratio)
-                    resp += bar
-                    self.bot.send_message(message.chat.id, resp)                    
-                    time.sleep(3)
-
-            self.bot.send_message(message.chat.id, "Finish")           
-  
-
-        @self.bot.message_handler(commands=['events'])
+        @self.command('events')
         def events(message):
-            self.bot.reply_to(message, "Events module in development…")
+            # answered from the detector's in-memory window, no API calls
+            args = self.parse_args(message.text)
+            coin = args.get("coin", args.get("c"))
+            coin = str(coin).upper() if coin not in (None, True) else None
+            detector = self.monitor.big_fills
+            hits = detector.latest(15, coin)
+            if not hits:
+                return self.bot.reply_to(message, f"No big fills yet ({detector.seen} fills scored over {len(detector.windows)} coins)")
+            resp = f"🐋 *Recent big fills*{' `#' + coin + '`' if coin else ''}\n\n"
+            resp += "\n".join(self.monitor.big_fill_print(h) for h in hits)
+            self.bot.reply_to(message, resp, parse_mode="Markdown", disable_web_page_preview=True)
+
+        @self.command('subscribe')
+        def subscribe(message):
+            args = self.parse_args(message.text)
+            try:
+                sub = Subscription(
+                    chat_id=message.chat.id,
+                    coins=frozenset(str(c).strip().upper() for c in str(args.get("coins", args.get("c", ""))).split(",") if str(c).strip()),
+                    wallets=frozenset(w.strip().lower() for w in str(args.get("wallets", args.get("w", ""))).split(",") if w.strip()),
+                    min_notional=float(args.get("min", args.get("m", 0)) or 0),
+                    direction=str(args.get("dir", args.get("d", ""))).lower(),
+                    min_pnl=float(args["pnl"]) if "pnl" in args else (float(args["p"]) if "p" in args else None),
+                    min_roi=float(args["roi"]) if "roi" in args else (float(args["r"]) if "r" in args else None),
+                )
+            except (TypeError, ValueError):
+                return self.bot.reply_to(message, "/subscribe --coins BTC,ETH --min <usd> --dir long|short --pnl <usd> --roi <pct> --wallets 0x..,0x..")
+            if sub.direction not in ("", "long", "short"):
+                return self.bot.reply_to(message, "--dir must be long or short")
+            self.subscriptions.put(sub)
+            self.store.save_subscription(sub)
+            self.bot.reply_to(message, "✔ Subscribed\n" + sub.describe())
+
+        @self.command('unsubscribe')
+        def unsubscribe(message):
+            self.subscriptions.remove(message.chat.id)
+            self.store.delete_subscription(message.chat.id)
+            self.bot.reply_to(message, "✔ Unsubscribed")
+
+        @self.command('subscription')
+        def subscription(message):
+            sub = self.subscriptions.get(message.chat.id)
+            if sub is None:
+                return self.bot.reply_to(message, "No subscription for this chat, see /help")
+            self.bot.reply_to(message, f"Subscription ({len(self.subscriptions)} chats subscribed in total)\n" + sub.describe())
+
+        @self.command('status')
+        def status(message):
+            now = time.time()
+            hydrated = sum(1 for t in self.traders if t.updated_at > 0)
+            resp = (
+                f"⚙️ *Status*: `{self.phase}`, up `{now - self.started:.0f}s`\n"
+                f"Traders: `{hydrated}/{len(self.traders)}` loaded\n"
+            )
+            if self.ready_after is not None:
+                resp += f"Warm-up took `{self.ready_after:.1f}s`\n"
+            if self.serving_after is not None:
+                resp += f"Serving commands `{self.serving_after:.2f}s` after start\n"
+            if self.first_latency is not None:
+                resp += f"First command answered `{self.first_latency:.1f}s` after it was sent\n"
+            history = json.loads(self.store.get_meta("serving_s") or "[]")
+            if len(history) > 1:
+                resp += f"Previous starts (serving after, s): `{history[-6:-1]}`\n"
+            resp += (
+                f"Poll cycles: `{self.poller.cycles}`, outbound queue: `{self.dispatcher.pending()}`, "
+                f"ledger drifts: `{self.api.ledger.drifts}`\n"
+            )
+            self.bot.reply_to(message, resp, parse_mode="Markdown")
+
+        @self.command('schedule')
+        def schedule(message):
+            queue_state = self.scheduler.snapshot()
+            if not queue_state:
+                return self.bot.reply_to(message, "Scheduler queue is empty")
+
+            now = time.time()
+            names = {t.address: t.name for t in self.traders}
+            active = sum(1 for s in queue_state if s.idle_cycles == 0 and s.last_active)
+            resp = (
+                f"⏱ *Poll scheduler*: {len(queue_state)} traders, {active} active\n"
+                f"Last cycle: `{self.poller.last_cycle_traders}` traders in `{self.poller.last_cycle_time:.2f}s`\n\n"
+            )
+            for s in queue_state[:20]:
+                resp += (
+                    f"{self.monitor.get_wallet_name(s.address, names.get(s.address))}\n"
+                    f"  next in `{max(0, s.deadline - now):.0f}s` every `{s.interval:.0f}s` "
+                    f"idle `{s.idle_cycles}` notional `${s.notional:,.0f}`\n"
+                )
+            self.bot.reply_to(message, resp, parse_mode="Markdown", disable_web_page_preview=True)
 
     # --------------------------
     # Your main loop
     # --------------------------
     def run(self):
         while True:
-            for trader in self.traders:
-                event_list = []
-                try:
-                    trader_timestump = self.last_trader_load.get(trader.address, 0)
-                    event_list = self.api.position_fills(trader, trader_timestump)
-                    self.last_trader_load[trader.address] = time.time()
-                    if event_list:
+            traders = {t.address: t for t in self.traders}
+            self.scheduler.sync(traders.keys())
+            due = [traders[a] for a in self.scheduler.due() if a in traders]
+            filled = set()
+            try:
+                if due:
+                    for trader, event_list in self.poller.run_cycle(due, self.watermarks):
+                        filled.add(trader.address)
                         self.monitor.push_event(trader, event_list)
-                        self.api.load_limit_orders(trader)
-                        self.api.position_update(trader)
-                    time.sleep(1.5)
-                except Exception as e:
-                    print("Error:", e)
-            time.sleep(self.config.poll_interval)
+            except Exception as e:
+                print("Error:", e)
+            finally:
+                for trader in due:
+                    notional = sum(abs(p.position_value) for p in trader.positions.values())
+                    self.scheduler.record(trader.address, trader.address in filled, notional)
+            time.sleep(min(max(self.scheduler.seconds_until_next(), 0.5), self.config.poll_interval))
+
+    def mark_to_market(self):
+        """Revalue every tracked position from one allMids call per MIDS_INTERVAL."""
+        while True:
+            try:
+                self.api.refresh_mids()
+            except Exception as e:
+                print("Mark-to-market error:", e)
+            time.sleep(self.config.mids_interval)
+
+    def persist(self):
+        while True:
+            time.sleep(self.config.state_save_interval)
+            try:
+                self.store.save_state(list(self.traders), self.watermarks)
+            except Exception as e:
+                print("State save error:", e)
 
 
 if __name__ == "__main__":
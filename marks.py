@@ -0,0 +1,264 @@
+# -----------------------------
+# Mid Prices & Mark-to-Market
+# -----------------------------
+from models import Trader
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+import threading
+import time
+import numpy as np
+
+
+class MidPriceCache:
+    """
+    One mid price per coin from a single allMids call, stored in a NumPy
+    array indexed by a stable per-coin id so positions can gather their
+    mark with one fancy-index. Unknown coins read as NaN.
+    """
+    def __init__(self):
+        self.coin_ids: Dict[str, int] = {}
+        self.prices = np.full(64, np.nan)
+        self.version = 0
+        self.updated_at = 0.0
+        self._lock = threading.Lock()
+
+    def coin_id(self, coin: str) -> int:
+        cid = self.coin_ids.get(coin)
+        if cid is None:
+            with self._lock:
+                cid = self.coin_ids.setdefault(coin, len(self.coin_ids))
+                if cid >= len(self.prices):
+                    grown = np.full(len(self.prices) * 2, np.nan)
+                    grown[:len(self.prices)] = self.prices
+                    self.prices = grown
+        return cid
+
+    def update(self, mids: Dict[str, str]):
+        """Apply an allMids response; spot pairs (@index) are skipped."""
+        for coin, px in mids.items():
+            if coin.startswith("@"):
+                continue
+            try:
+                self.prices[self.coin_id(coin)] = float(px)
+            except (TypeError, ValueError):
+                continue
+        self.version += 1
+        self.updated_at = time.time()
+
+    def get(self, coin: str) -> Optional[float]:
+        cid = self.coin_ids.get(coin)
+        if cid is None or np.isnan(self.prices[cid]):
+            return None
+        return float(self.prices[cid])
+
+
+@dataclass(slots=True)
+class LiquidationHit:
+    trader: Trader
+    coin: str
+    level: float      # threshold crossed, % distance
+    distance: float   # current % distance from mid to liquidation
+    mid: float
+    liquidation_px: float
+    size: float
+    margin_used: float
+
+
+class PositionTable:
+    """
+    Struct-of-arrays copy of every open position (size, entry, coin id),
+    one row per (trader, coin), kept in step through sync_trader whenever
+    a trader's positions change. revalue() marks every row to the cached
+    mids in one vectorized pass and keeps value/unPnL in the columns;
+    readers pull them from there: mark_trader() for the positions of one
+    trader about to be rendered, coin_notional() for per-coin totals.
+    per-trader clearinghouseState calls are only needed for checkpoints.
+    version increases whenever a column changes.
+    """
+    def __init__(self, mids: MidPriceCache, capacity: int = 1024):
+        self.mids = mids
+        self.rows: Dict[Tuple[str, str], int] = {}
+        self.by_trader: Dict[str, Set[str]] = {}  # address -> coins with a row
+        self.refs: List[Optional[Tuple[Trader, str]]] = [None] * capacity
+        self.free: List[int] = []
+        self.n = 0
+        self.size = np.zeros(capacity)
+        self.entry = np.zeros(capacity)
+        self.coin = np.zeros(capacity, dtype=np.int32)
+        self.active = np.zeros(capacity, dtype=bool)
+        self.value = np.zeros(capacity)  # marked notional
+        self.unpnl = np.zeros(capacity)
+        self.liq = np.zeros(capacity)     # liquidationPx, 0 = none, NaN = not loaded yet
+        self.margin = np.zeros(capacity)
+        self.liq_level = np.zeros(capacity, dtype=np.int8)  # thresholds currently crossed
+        self.version = 0
+        self._notional = (-1, {})  # (version, coin_notional() result)
+        self._lock = threading.Lock()
+
+    COLUMNS = ("size", "entry", "coin", "active", "value", "unpnl", "liq", "margin", "liq_level")
+
+    def _grow(self):
+        cap = len(self.active) * 2
+        for name in self.COLUMNS:
+            old = getattr(self, name)
+            new = np.zeros(cap, dtype=old.dtype)
+            new[:len(old)] = old
+            setattr(self, name, new)
+        self.refs.extend([None] * (cap - len(self.refs)))
+
+    def _row(self, key: Tuple[str, str]) -> int:
+        row = self.rows.get(key)
+        if row is None:
+            if self.free:
+                row = self.free.pop()
+            else:
+                if self.n == len(self.active):
+                    self._grow()
+                row = self.n
+                self.n += 1
+            self.rows[key] = row
+        return row
+
+    def _drop(self, key: Tuple[str, str]):
+        row = self.rows.pop(key, None)
+        if row is not None:
+            self.active[row] = False
+            self.liq_level[row] = 0
+            self.refs[row] = None
+            self.free.append(row)
+
+    def _write(self, row: int, pos):
+        # an unchanged position keeps its mark, which is newer than pos.position_value
+        if not (self.active[row] and self.size[row] == pos.size and self.entry[row] == pos.entry):
+            self.value[row] = abs(pos.position_value)
+            self.unpnl[row] = pos.unpnl
+        self.size[row] = pos.size
+        self.entry[row] = pos.entry
+        self.liq[row] = pos.liquidation_px
+        self.margin[row] = pos.margin_used
+
+    def sync_trader(self, trader: Trader):
+        with self._lock:
+            open_coins = set()
+            for coin, pos in list(trader.positions.items()):
+                if pos.is_long is None or not pos.size:
+                    continue
+                open_coins.add(coin)
+                row = self._row((trader.address, coin))
+                self._write(row, pos)
+                self.coin[row] = self.mids.coin_id(coin)
+                self.active[row] = True
+                self.refs[row] = (trader, coin)
+            for coin in self.by_trader.get(trader.address, set()) - open_coins:
+                self._drop((trader.address, coin))
+            self.by_trader[trader.address] = open_coins
+            self.version += 1
+
+    def retain(self, addresses: Iterable[str]):
+        keep = set(addresses)
+        with self._lock:
+            for address in [a for a in self.by_trader if a not in keep]:
+                for coin in self.by_trader.pop(address):
+                    self._drop((address, coin))
+                self.version += 1
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def revalue(self) -> int:
+        """Mark every open position to the cached mid; returns how many rows moved."""
+        with self._lock:
+            n = self.n
+            px = self.mids.prices[self.coin[:n]]
+            size = self.size[:n]
+            value = np.abs(size) * px
+            # rows without a mid keep their last value
+            changed = self.active[:n] & ~np.isnan(px) & (value != self.value[:n])
+            self.value[:n] = np.where(changed, value, self.value[:n])
+            self.unpnl[:n] = np.where(changed, (px - self.entry[:n]) * size, self.unpnl[:n])
+            moved = int(np.count_nonzero(changed))
+            if moved:
+                self.version += 1
+        return moved
+
+    def mark_trader(self, trader: Trader):
+        """Copy the current marks into the Position objects of one trader: O(its coins)."""
+        with self._lock:
+            for coin in self.by_trader.get(trader.address, ()):
+                row = self.rows[(trader.address, coin)]
+                pos = trader.positions.get(coin)
+                # a fill folded after the last sync wins until the next one
+                if pos is not None and pos.size == self.size[row]:
+                    pos.position_value = float(self.value[row])
+                    pos.unpnl = float(self.unpnl[row])
+
+    def coin_notional(self) -> Tuple[int, Dict[str, Tuple[float, float]]]:
+        """(version, {coin: (long notional, short notional)}) from np.bincount over the coin ids."""
+        cached = self._notional
+        if cached[0] == self.version:
+            return cached
+        names = list(self.mids.coin_ids)  # insertion order is id order
+        with self._lock:
+            version = self.version
+            n = self.n
+            coin = self.coin[:n]
+            value = np.where(self.active[:n], self.value[:n], 0.0)
+            is_long = self.size[:n] > 0
+            longs = np.bincount(coin, weights=np.where(is_long, value, 0.0), minlength=len(names))
+            shorts = np.bincount(coin, weights=np.where(is_long, 0.0, value), minlength=len(names))
+        out = {
+            names[cid]: (float(longs[cid]), float(shorts[cid]))
+            for cid in np.flatnonzero(longs + shorts).tolist() if cid < len(names)
+        }
+        self._notional = (version, out)
+        return self._notional
+
+    def unpriced_traders(self) -> List[Trader]:
+        """Traders holding an open row whose liquidation price has not been loaded yet."""
+        with self._lock:
+            n = self.n
+            rows = np.flatnonzero(self.active[:n] & np.isnan(self.liq[:n]))
+            traders = {}
+            for row in rows.tolist():
+                trader = self.refs[row][0]
+                traders[trader.address] = trader
+        return list(traders.values())
+
+    def liquidation_hits(self, levels: Sequence[float], hysteresis: float) -> List[LiquidationHit]:
+        """
+        Distance from mid to liquidation for every row in one NumPy pass.
+        levels are % distances (e.g. 10, 5, 2); a row escalates when it gets
+        within a tighter level and only steps back down once it is more than
+        level * (1 + hysteresis) away, so a price hovering at a threshold does
+        not re-alert. Only escalations are returned.
+        """
+        th = np.sort(np.asarray(levels, dtype=np.float64))[::-1] / 100.0
+        if th.size == 0:
+            return []
+        with self._lock:
+            n = self.n
+            px = self.mids.prices[self.coin[:n]]
+            liq = self.liq[:n]
+            size = self.size[:n]
+            valid = self.active[:n] & (liq > 0) & ~np.isnan(px) & (px > 0)
+            with np.errstate(invalid="ignore", divide="ignore"):
+                # longs are liquidated below the mid, shorts above it; past it counts as 0
+                dist = np.where(size > 0, px - liq, liq - px) / px
+            dist = np.where(valid, np.maximum(dist, 0.0), np.inf)
+
+            cur = self.liq_level[:n].astype(np.int16)
+            enter = (dist[:, None] <= th[None, :]).sum(axis=1)
+            keep = (dist[:, None] <= th[None, :] * (1.0 + hysteresis)).sum(axis=1)
+            new = np.where(enter > cur, enter, np.minimum(cur, keep))
+            rising = np.flatnonzero(new > cur)
+            self.liq_level[:n] = new
+
+            hits = []
+            for row in rising.tolist():
+                trader, coin = self.refs[row]
+                hits.append(LiquidationHit(
+                    trader=trader, coin=coin, level=float(th[new[row] - 1] * 100.0),
+                    distance=float(dist[row] * 100.0), mid=float(px[row]),
+                    liquidation_px=float(liq[row]), size=float(size[row]), margin_used=float(self.margin[row]),
+                ))
+        return hits
@@ -0,0 +1,97 @@
+# -----------------------------
+# Local mock of the Hyperliquid /info endpoint (for benchmarks)
+# -----------------------------
+# python mock_info.py [--port 18777] [--procs 2] [--latency 0.02] [--fills 20]
+# Every userFillsByTime answers with `fills` fresh perp fills, so each poll
+# of each trader yields a batch to process; clearinghouseState returns one
+# BTC position, everything else an empty list. `latency` is slept per
+# request to stand in for the network. With --procs > 1 the processes share
+# the port (SO_REUSEPORT) so the mock is not the bottleneck.
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+import argparse
+import itertools
+import json
+import multiprocessing
+import socket
+import time
+
+STATE = {"assetPositions": [{"type": "oneWay", "position": {
+    "coin": "BTC", "szi": "0.1", "positionValue": "10", "entryPx": "100",
+    "leverage": {"value": 2}, "unrealizedPnl": "0"}}]}
+
+
+class ReusePortServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def server_bind(self):
+        if hasattr(socket, "SO_REUSEPORT"):
+            self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+        super().server_bind()
+
+
+def make_handler(latency: float, fills: int):
+    tids = itertools.count(1)
+
+    class InfoHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # keep-alive, like the real API
+
+        def log_message(self, *args):
+            pass
+
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            if latency:
+                time.sleep(latency)
+            kind = body.get("type")
+            if kind == "userFillsByTime":
+                now = int(time.time() * 1000)
+                out = [{"coin": "BTC", "px": "100", "sz": "0.001", "side": "B", "time": now,
+                        "startPosition": "0.1", "dir": "Open Long", "closedPnl": "0", "hash": "0x0",
+                        "oid": 1, "crossed": True, "fee": "0", "tid": next(tids), "feeToken": "USDC"}
+                       for _ in range(fills)]
+            elif kind == "clearinghouseState":
+                out = STATE
+            elif kind == "allMids":
+                out = {"BTC": "100"}
+            else:
+                out = []
+            data = json.dumps(out).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+    return InfoHandler
+
+
+def serve(port: int, latency: float = 0.0, fills: int = 1):
+    ReusePortServer(("127.0.0.1", port), make_handler(latency, fills)).serve_forever()
+
+
+def start(port: int, procs: int = 1, latency: float = 0.0, fills: int = 1) -> list:
+    """Spawn `procs` server processes on `port`; the caller terminates them."""
+    ctx = multiprocessing.get_context("spawn")
+    servers = [ctx.Process(target=serve, args=(port, latency, fills), daemon=True) for _ in range(procs)]
+    for p in servers:
+        p.start()
+    deadline = time.time() + 10
+    while time.time() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            break
+        except OSError:
+            time.sleep(0.1)
+    return servers
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=18777)
+    parser.add_argument("--procs", type=int, default=1)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--fills", type=int, default=1)
+    args = parser.parse_args()
+    print(f"mock /info on http://127.0.0.1:{args.port}/info ({args.procs} procs)")
+    for p in start(args.port, args.procs, args.latency, args.fills):
+        p.join()
@@ -1,10 +1,32 @@
 from dataclasses import dataclass, field
 # from abc import ABC
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Sequence
+import sys
 # -----------------------------
 # Data Models
 # -----------------------------]
-@dataclass
+# slots=True: no per-instance __dict__, which matters with thousands of traders
+
+
+def intern_coin(coin: str) -> str:
+    """One shared str object per coin symbol across every trader, order and event."""
+    return sys.intern(coin) if coin else coin
+
+
+class _NoOrders(dict):
+    """Shared read-only empty book; Position swaps in a real dict on first insert."""
+    __slots__ = ()
+
+    def _readonly(self, *args, **kwargs):
+        raise TypeError("use Position.upsert_order to add orders")
+
+    __setitem__ = update = setdefault = _readonly
+
+
+NO_ORDERS = _NoOrders()
+
+
+@dataclass(slots=True)
 class Order:
     oid: int = 0.0
     limit: float = 0.0
@@ -16,7 +38,7 @@ class Order:
 
     # is_buy: bool
 
-@dataclass
+@dataclass(slots=True)
 class Position:
     position_value: float = 0.0
     size: float = 0.0
@@ -25,21 +47,42 @@ class Position:
     leverage: int = 1
     is_mod: bool = False
     unpnl: float = 0.0
+    realized_pnl: float = 0.0  # closedPnl folded from fills
+    liquidation_px: float = 0.0  # 0 when clearinghouseState reports none, NaN until loaded after an open/flip
+    margin_used: float = 0.0
     tp : Order = None
     sl : Order = None
-    buy_order: List[Order] = field(default_factory=list)
-    sell_order: List[Order] = field(default_factory=list)
-    market:    List[Order] = field(default_factory=list)
+    buy_order: Dict[int, Order] = field(default_factory=lambda: NO_ORDERS)   # oid -> resting bid
+    sell_order: Dict[int, Order] = field(default_factory=lambda: NO_ORDERS)  # oid -> resting ask
+    market:    Sequence[Order] = ()
+
+    def upsert_order(self, order: Order):
+        if order.side == "B":
+            if self.buy_order is NO_ORDERS:
+                self.buy_order = {}
+            book, other = self.buy_order, self.sell_order
+        else:
+            if self.sell_order is NO_ORDERS:
+                self.sell_order = {}
+            book, other = self.sell_order, self.buy_order
+        other.pop(order.oid, None)
+        book[order.oid] = order
 
-@dataclass
+    def remove_order(self, oid: int):
+        self.buy_order.pop(oid, None)
+        self.sell_order.pop(oid, None)
+
+@dataclass(slots=True)
 class Trader:
     name : str = None
     address: str = None
     pnl: float = None
     positions: Dict[str, Position] = field(default_factory=dict)
     roi: float = None
+    volume: float = None
+    updated_at: float = 0.0  # when positions/orders were last loaded from clearinghouseState
 
-@dataclass
+@dataclass(slots=True)
 class FillEvent:
     closedPnl: float
     coin: str
@@ -56,6 +99,29 @@ class FillEvent:
     fee_token: str
     builder_fee: float
     tid: int
+    fills: int = 1  # >1 when several fills were merged into one digest
+
+@dataclass(slots=True)
+class PositionChange:
+    kind: str          # open / increase / reduce / close / flip
+    coin: str
+    prev_size: float   # signed szi before
+    size: float        # signed szi after
+    price: float       # mark implied by positionValue / |szi|
+
+@dataclass(slots=True)
+class OrderEvent:
+    kind: str          # placed / cancelled / resized / repriced / tpsl_moved
+    coin: str
+    oid: int
+    side: str
+    price: float
+    size: float
+    is_tpsl: bool
+    reduce_only: bool
+    prev_price: Optional[float]
+    prev_size: Optional[float]
+    time: int
 #     tid: int = 0
 #     coin: str = None
 #     volume_percent: float = 0.0 
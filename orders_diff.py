@@ -0,0 +1,119 @@
+# -----------------------------
+# Open-order Diff Engine
+# -----------------------------
+from models import OrderEvent, intern_coin
+from typing import Dict, Iterable, List, NamedTuple
+import time
+
+
+class OrderRecord(NamedTuple):
+    coin: str
+    side: str
+    price: float     # limitPx, or triggerPx for TP/SL
+    size: float      # remaining size
+    is_tpsl: bool
+    reduce_only: bool
+    role: str        # "tp" or "sl" for TP/SL, from orderType; "" when unknown
+
+
+def tpsl_role(order_type: str) -> str:
+    # frontendOpenOrders orderType: "Take Profit Market/Limit", "Stop Market/Limit"
+    if order_type.startswith("Take Profit"):
+        return "tp"
+    if order_type.startswith("Stop"):
+        return "sl"
+    return ""
+
+
+def order_record(o: dict) -> OrderRecord:
+    is_tpsl = bool(o.get("isTrigger", False) and o.get("isPositionTpsl", False))
+    price = float(o.get("triggerPx", 0) if is_tpsl else o.get("limitPx", 0))
+    return OrderRecord(
+        coin=intern_coin(o.get("coin", "")),
+        side=o.get("side", ""),
+        price=price,
+        size=float(o.get("sz", 0)),
+        is_tpsl=is_tpsl,
+        reduce_only=bool(o.get("reduceOnly", False)),
+        role=tpsl_role(o.get("orderType") or "") if is_tpsl else "",
+    )
+
+
+class OrderDiffEngine:
+    """
+    Keeps the last frontendOpenOrders snapshot per trader as oid -> OrderRecord
+    and turns each new snapshot into typed OrderEvents: placed, cancelled,
+    resized, repriced, and tpsl_moved (a TP/SL replaced by one with the same
+    coin, side and role, or re-triggered). A position's TP and SL sit on the
+    same side, so without a known role a replacement is cancelled + placed.
+    The first snapshot of a trader is only a baseline.
+    """
+    def __init__(self):
+        self.books: Dict[str, Dict[int, OrderRecord]] = {}
+
+    def retain(self, addresses: Iterable[str]):
+        keep = set(addresses)
+        for address in [a for a in self.books if a not in keep]:
+            del self.books[address]
+
+    def diff(self, address: str, data: List[dict]) -> List[OrderEvent]:
+        new = {int(o.get("oid", 0)): order_record(o) for o in data}
+        old = self.books.get(address)
+        self.books[address] = new
+        if old is None:
+            return []
+
+        now = int(time.time() * 1000)
+        events = []
+        placed = [oid for oid in new if oid not in old]
+        gone = [oid for oid in old if oid not in new]
+
+        # a TP/SL that vanished while one of the same role appeared on the same coin/side was moved
+        gone_tpsl: Dict[tuple, List[int]] = {}
+        for oid in gone:
+            rec = old[oid]
+            if rec.is_tpsl and rec.role:
+                gone_tpsl.setdefault((rec.coin, rec.side, rec.role), []).append(oid)
+        for oid in list(placed):
+            rec = new[oid]
+            if not (rec.is_tpsl and rec.role):
+                continue
+            candidates = gone_tpsl.get((rec.coin, rec.side, rec.role))
+            if not candidates:
+                continue
+            prev_oid = candidates.pop(0)
+            prev = old[prev_oid]
+            placed.remove(oid)
+            gone.remove(prev_oid)
+            events.append(self._event("tpsl_moved", oid, rec, now, prev))
+
+        for oid in placed:
+            events.append(self._event("placed", oid, new[oid], now))
+        for oid in gone:
+            events.append(self._event("cancelled", oid, old[oid], now))
+
+        for oid, rec in new.items():
+            prev = old.get(oid)
+            if prev is None or prev == rec:
+                continue
+            if rec.price != prev.price:
+                events.append(self._event("tpsl_moved" if rec.is_tpsl else "repriced", oid, rec, now, prev))
+            elif rec.size != prev.size:
+                events.append(self._event("resized", oid, rec, now, prev))
+        return events
+
+    @staticmethod
+    def _event(kind: str, oid: int, rec: OrderRecord, now: int, prev: OrderRecord = None) -> OrderEvent:
+        return OrderEvent(
+            kind=kind,
+            coin=rec.coin,
+            oid=oid,
+            side=rec.side,
+            price=rec.price,
+            size=rec.size,
+            is_tpsl=rec.is_tpsl,
+            reduce_only=rec.reduce_only,
+            prev_price=prev.price if prev is not None else None,
+            prev_size=prev.size if prev is not None else None,
+            time=now,
+        )
@@ -0,0 +1,182 @@
+# -----------------------------
+# Async Poll Engine
+# -----------------------------
+from models import Trader, FillEvent
+from watermarks import FillWatermarks
+from typing import Dict, List, Tuple
+from concurrent.futures import Future
+import asyncio
+import threading
+import time
+
+
+class AsyncPoller:
+    """
+    Fans the per-trader /info requests (userFillsByTime, frontendOpenOrders,
+    clearinghouseState) out over one event loop, at most POLL_CONCURRENCY in flight.
+    Parsing is delegated to HyperliquidAPI so both paths share the same models.
+    The loop runs in its own thread, so background refreshes can be submitted
+    from any thread while a poll cycle is in flight.
+    """
+    LOG_EVERY = 60  # seconds between cycle log lines
+
+    def __init__(self, api, config):
+        self.api = api
+        self.cfg = config
+        self.loop = asyncio.new_event_loop()
+        threading.Thread(target=self.loop.run_forever, daemon=True).start()
+        self._sem = None
+        self.refreshing = set()
+        self.last_cycle_time = 0.0
+        self.last_cycle_traders = 0
+        self.cycles = 0
+        self.last_log = 0.0
+
+    @property
+    def sem(self) -> asyncio.Semaphore:
+        # shared by poll cycles and refreshes so POLL_CONCURRENCY is a global cap
+        if self._sem is None:
+            self._sem = asyncio.Semaphore(max(1, self.cfg.poll_concurrency))
+        return self._sem
+
+    async def _post_info(self, sem: asyncio.Semaphore, payload: Dict):
+        async with sem:
+            return await self.api._apost_info(payload)
+
+    async def _poll_fills(self, sem, trader: Trader, watermarks: FillWatermarks) -> List[FillEvent]:
+        payload = self.api.fills_payload(trader, watermarks.since(trader.address))
+        events = []
+        last_time = 0
+        while payload is not None:
+            data = await self._post_info(sem, payload)
+            events += self.api.parse_fills(trader, data)
+            last_time = max(last_time, self.api.page_time(data))
+            payload = self.api.next_fills_page(payload, data)
+        # the request overlaps the previous one by design; keep only unseen fills
+        fresh = watermarks.accept(trader.address, events)
+        # spot fills are dropped by parse_fills but must not be downloaded again
+        watermarks.advance(trader.address, last_time)
+        return fresh
+
+    async def _poll_snapshot(self, sem, trader: Trader, watermarks: FillWatermarks) -> Tuple[Trader, List[FillEvent]]:
+        """
+        SNAPSHOT_DIFF: one clearinghouseState per cycle. Fills (and orders) are
+        only fetched when the positions changed; if no fill explains the change
+        a stand-in event is built from the diff so the alert still goes out.
+        """
+        state_payload = {"type": "clearinghouseState", "user": trader.address}
+        orders_payload = {"type": "frontendOpenOrders", "user": trader.address}
+        if self.cfg.order_alerts:
+            state, orders = await asyncio.gather(
+                self._post_info(sem, state_payload),
+                self._post_info(sem, orders_payload),
+            )
+        else:
+            state, orders = await self._post_info(sem, state_payload), None
+
+        changes = self.api.position_changes(trader, state)
+        # the snapshot is the source of truth here, fills only enrich the alert
+        self.api.apply_clearinghouse_state(trader, state, check=False)
+        events = []
+        if changes:
+            if orders is None:
+                events, orders = await asyncio.gather(
+                    self._poll_fills(sem, trader, watermarks),
+                    self._post_info(sem, orders_payload),
+                )
+            else:
+                events = await self._poll_fills(sem, trader, watermarks)
+            explained = {ev.coin for ev in events}
+            events += [self.api.change_fill(c) for c in changes if c.coin not in explained]
+        if orders is not None:
+            self.api.apply_open_orders(trader, orders)
+        return trader, events
+
+    async def _poll_trader(self, sem, trader: Trader, watermarks: FillWatermarks) -> Tuple[Trader, List[FillEvent]]:
+        if self.cfg.snapshot_diff:
+            return await self._poll_snapshot(sem, trader, watermarks)
+        state_payload = {"type": "clearinghouseState", "user": trader.address}
+        orders_payload = {"type": "frontendOpenOrders", "user": trader.address}
+        if self.cfg.order_alerts:
+            # ORDER_ALERTS: the order book is diffed every cycle, fetch it alongside the fills
+            events, orders = await asyncio.gather(
+                self._poll_fills(sem, trader, watermarks),
+                self._post_info(sem, orders_payload),
+            )
+            if events:
+                self.api.apply_fills(trader, events)
+                if self.api.checkpoint_due(trader):
+                    self.api.apply_clearinghouse_state(trader, await self._post_info(sem, state_payload))
+            self.api.apply_open_orders(trader, orders)
+            return trader, events
+
+        events = await self._poll_fills(sem, trader, watermarks)
+        if events:
+            # positions are folded from the fills; clearinghouseState only as a checkpoint
+            self.api.apply_fills(trader, events)
+            if self.api.checkpoint_due(trader):
+                state, orders = await asyncio.gather(
+                    self._post_info(sem, state_payload),
+                    self._post_info(sem, orders_payload),
+                )
+                self.api.apply_clearinghouse_state(trader, state)
+            else:
+                orders = await self._post_info(sem, orders_payload)
+            self.api.apply_open_orders(trader, orders)
+
+        return trader, events
+
+    async def _refresh_trader(self, trader: Trader):
+        try:
+            state, orders = await asyncio.gather(
+                self._post_info(self.sem, {"type": "clearinghouseState", "user": trader.address}),
+                self._post_info(self.sem, {"type": "frontendOpenOrders", "user": trader.address}),
+            )
+            self.api.apply_clearinghouse_state(trader, state)
+            self.api.apply_open_orders(trader, orders)
+        finally:
+            self.refreshing.discard(trader.address)
+
+    async def _refresh(self, traders: List[Trader]):
+        return await asyncio.gather(*[self._refresh_trader(t) for t in traders], return_exceptions=True)
+
+    def refresh(self, traders: List[Trader]) -> Future:
+        """
+        Reload positions and orders of these traders concurrently in the background.
+        Traders already being refreshed are skipped; returns a Future to wait on if needed.
+        """
+        todo = [t for t in traders if t.address not in self.refreshing]
+        self.refreshing.update(t.address for t in todo)
+        return asyncio.run_coroutine_threadsafe(self._refresh(todo), self.loop)
+
+    async def poll_cycle(self, traders: List[Trader], watermarks: FillWatermarks):
+        tasks = [self._poll_trader(self.sem, trader, watermarks) for trader in traders]
+        return await asyncio.gather(*tasks, return_exceptions=True)
+
+    def run_cycle(self, traders: List[Trader], watermarks: FillWatermarks) -> List[Tuple[Trader, List[FillEvent]]]:
+        """
+        Poll every trader once. Advances the watermarks and returns
+        (trader, events) pairs for traders that had new fills.
+        """
+        started = time.perf_counter()
+        traders = list(traders)
+        results = asyncio.run_coroutine_threadsafe(self.poll_cycle(traders, watermarks), self.loop).result()
+
+        out = []
+        for res in results:
+            if isinstance(res, Exception):
+                print("Error:", res)
+                continue
+            trader, events = res
+            if events:
+                out.append((trader, events))
+
+        self.last_cycle_time = time.perf_counter() - started
+        self.last_cycle_traders = len(traders)
+        self.cycles += 1
+        # the scheduler can cycle every 0.5s; /schedule shows the latest cycle anyway
+        now = time.time()
+        if now - self.last_log >= self.LOG_EVERY:
+            self.last_log = now
+            print(f"poll cycle #{self.cycles}: {len(traders)} traders in {self.last_cycle_time:.2f}s, {len(out)} with fills")
+        return out
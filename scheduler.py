@@ -0,0 +1,97 @@
+# -----------------------------
+# Adaptive Poll Scheduler
+# -----------------------------
+from dataclasses import dataclass
+from typing import Dict, Iterable, List
+import heapq
+import time
+
+
+@dataclass
+class TraderSchedule:
+    address: str
+    interval: float
+    deadline: float
+    idle_cycles: int = 0
+    last_active: float = 0.0
+    notional: float = 0.0
+    seq: int = 0
+
+
+class PollScheduler:
+    """
+    Min-heap of next-poll deadlines, one live entry per trader.
+    Traders that just filled drop to POLL_MIN_INTERVAL, idle ones back off
+    by POLL_BACKOFF up to POLL_MAX_INTERVAL. Traders holding more than
+    MIN_POSITION_SIZE notional never back off past POLL_INTERVAL.
+    """
+    def __init__(self, config):
+        self.cfg = config
+        self._heap = []
+        self._state: Dict[str, TraderSchedule] = {}
+        self._seq = 0
+
+    def _push(self, s: TraderSchedule):
+        # entries are never removed from the heap, stale ones are skipped by seq
+        self._seq += 1
+        s.seq = self._seq
+        heapq.heappush(self._heap, (s.deadline, s.seq, s.address))
+
+    def sync(self, addresses: Iterable[str], now: float = None):
+        """Track exactly these addresses; newcomers are due immediately."""
+        now = time.time() if now is None else now
+        wanted = set(addresses)
+        for address in list(self._state):
+            if address not in wanted:
+                del self._state[address]
+        for address in wanted:
+            if address not in self._state:
+                s = TraderSchedule(address=address, interval=self.cfg.poll_interval, deadline=now)
+                self._state[address] = s
+                self._push(s)
+
+    def due(self, now: float = None) -> List[str]:
+        """Pop every trader whose deadline has passed. They get rescheduled by record()."""
+        now = time.time() if now is None else now
+        out = []
+        while self._heap and self._heap[0][0] <= now:
+            _, seq, address = heapq.heappop(self._heap)
+            s = self._state.get(address)
+            if s is None or s.seq != seq:
+                continue
+            out.append(address)
+        return out
+
+    def record(self, address: str, had_fills: bool, notional: float = 0.0, now: float = None):
+        now = time.time() if now is None else now
+        s = self._state.get(address)
+        if s is None:
+            return
+        s.notional = notional
+        if had_fills:
+            s.idle_cycles = 0
+            s.last_active = now
+            s.interval = self.cfg.poll_min_interval
+        else:
+            s.idle_cycles += 1
+            s.interval = min(max(s.interval, self.cfg.poll_min_interval) * self.cfg.poll_backoff,
+                             self.cfg.poll_max_interval)
+        if notional >= self.cfg.min_position_size:
+            s.interval = min(s.interval, self.cfg.poll_interval)
+        s.deadline = now + s.interval
+        self._push(s)
+
+    def seconds_until_next(self, now: float = None) -> float:
+        now = time.time() if now is None else now
+        while self._heap:
+            deadline, seq, address = self._heap[0]
+            s = self._state.get(address)
+            if s is None or s.seq != seq:
+                heapq.heappop(self._heap)
+                continue
+            return max(0.0, deadline - now)
+        return float(self.cfg.poll_interval)
+
+    def snapshot(self) -> List[TraderSchedule]:
+        """Current queue state ordered by next deadline."""
+        return sorted(self._state.values(), key=lambda s: s.deadline)
@@ -0,0 +1,209 @@
+# -----------------------------
+# Multi-process Sharded Polling
+# -----------------------------
+from models import Trader
+from store import position_to_json, position_from_json
+from watermarks import FillWatermarks
+from typing import Dict, List, Optional, Set, Tuple
+from concurrent.futures import Future
+import multiprocessing
+import queue
+import threading
+import time
+
+# one tracked trader as handed to a worker:
+# (address, name, pnl, roi, volume, {coin: position json}, (last_time, tids) or None)
+Assignment = Tuple[str, str, float, float, float, Dict[str, str], Optional[Tuple[int, List[int]]]]
+
+
+def positions_payload(trader: Trader) -> Dict[str, str]:
+    return {coin: position_to_json(pos) for coin, pos in list(trader.positions.items())}
+
+
+def shard_worker(shard_id: int, inbox, outbox):
+    """
+    Worker process: its own HyperliquidAPI, AsyncPoller, PollScheduler and
+    watermarks for the addresses assigned to it. Every batch of fills or
+    order events goes back as ("events", address, events, positions,
+    watermark) so the notifier process only renders and sends. A
+    ("refresh", addresses) command reloads those traders here and ships
+    their positions back even when nothing changed.
+    """
+    # imported here so the parent never builds an event loop or HTTP pool for workers
+    from config import Config
+    from hyperliquid import HyperliquidAPI
+    from poller import AsyncPoller
+    from scheduler import PollScheduler
+
+    config = Config()
+    api = HyperliquidAPI(config)
+    poller = AsyncPoller(api, config)
+    scheduler = PollScheduler(config)
+    watermarks = FillWatermarks()
+    traders: Dict[str, Trader] = {}
+    api.order_sink = lambda trader, events: outbox.put(
+        ("events", trader.address, events, positions_payload(trader), None))
+
+    def assign(entries: List[Assignment]):
+        keep = {}
+        for address, name, pnl, roi, volume, positions, watermark in entries:
+            trader = traders.get(address)
+            if trader is None:
+                # new to this shard: start from the notifier's copy of its state
+                trader = Trader(name=name, address=address, pnl=pnl, roi=roi, volume=volume,
+                                positions={c: position_from_json(p) for c, p in positions.items()})
+                if watermark is not None:
+                    watermarks.restore(address, *watermark)
+                watermarks.start(address)
+            keep[address] = trader
+        traders.clear()
+        traders.update(keep)
+        watermarks.retain(traders)
+        api.retain(traders)
+        print(f"shard {shard_id}: {len(traders)} traders")
+
+    def refresh(addresses: List[str]):
+        todo = [traders[a] for a in addresses if a in traders]
+        try:
+            poller.refresh(todo).result()
+        except Exception as e:
+            print(f"shard {shard_id} refresh error: {e}")
+        for trader in todo:
+            outbox.put(("events", trader.address, [], positions_payload(trader), None))
+
+    timeout = None
+    while True:
+        try:
+            cmd = inbox.get(timeout=timeout)
+            if cmd[0] == "stop":
+                return
+            if cmd[0] == "assign":
+                assign(cmd[1])
+            if cmd[0] == "refresh":
+                refresh(cmd[1])
+            timeout = 0  # drain every pending command before polling
+            continue
+        except queue.Empty:
+            pass
+
+        scheduler.sync(traders.keys())
+        due = [traders[a] for a in scheduler.due() if a in traders]
+        filled = set()
+        try:
+            if due:
+                for trader, events in poller.run_cycle(due, watermarks):
+                    filled.add(trader.address)
+                    outbox.put(("events", trader.address, events, positions_payload(trader),
+                                watermarks.export(trader.address)))
+        except Exception as e:
+            print(f"shard {shard_id} error: {e}")
+        finally:
+            for trader in due:
+                notional = sum(abs(p.position_value) for p in trader.positions.values())
+                scheduler.record(trader.address, trader.address in filled, notional)
+        timeout = min(max(scheduler.seconds_until_next(), 0.5), config.poll_interval)
+
+
+class ShardCoordinator:
+    """
+    Runs SHARDS worker processes and splits the tracked addresses between
+    them (sorted, round-robin, reassigned whenever the trader set changes).
+    Results are applied to the notifier's Trader objects: positions replaced,
+    watermarks advanced, aggregates synced, then handed to EventMonitor.
+    Reloads go to the owning shard through refresh(), so order diffs stay
+    in the one process that polls the trader.
+    """
+    def __init__(self, api, config, monitor, watermarks: FillWatermarks):
+        self.api = api
+        self.cfg = config
+        self.monitor = monitor
+        self.watermarks = watermarks
+        self.traders: Dict[str, Trader] = {}
+        self.owner: Dict[str, int] = {}  # address -> shard index
+        self.waiting: List[Tuple[Future, Set[str]]] = []  # refresh() futures and the addresses still due
+        self._lock = threading.Lock()
+        ctx = multiprocessing.get_context("spawn")
+        self.outbox = ctx.Queue()
+        self.inboxes = [ctx.Queue() for _ in range(max(1, config.shards))]
+        self.workers = [
+            ctx.Process(target=shard_worker, args=(i, inbox, self.outbox), daemon=True)
+            for i, inbox in enumerate(self.inboxes)
+        ]
+        self.received = 0
+
+    def start(self):
+        for w in self.workers:
+            w.start()
+        threading.Thread(target=self._drain, daemon=True).start()
+
+    def stop(self):
+        for inbox in self.inboxes:
+            inbox.put(("stop",))
+
+    def set_traders(self, traders: List[Trader]):
+        """Rebalance: every worker gets its full new assignment."""
+        self.traders = {t.address: t for t in traders}
+        addrs = sorted(self.traders)
+        n = len(self.inboxes)
+        self.owner = {address: i % n for i, address in enumerate(addrs)}
+        for i, inbox in enumerate(self.inboxes):
+            entries = []
+            for address in addrs[i::n]:
+                t = self.traders[address]
+                watermark = self.watermarks.export(address) if address in self.watermarks else None
+                entries.append((address, t.name, t.pnl, t.roi, t.volume, positions_payload(t), watermark))
+            inbox.put(("assign", entries))
+
+    def refresh(self, traders: List[Trader]) -> Future:
+        """
+        Ask the owning shards to reload these traders; results arrive through
+        _drain. The returned Future resolves once every one of them reported back.
+        """
+        fut = Future()
+        by_shard: Dict[int, List[str]] = {}
+        for t in traders:
+            shard = self.owner.get(t.address)
+            if shard is not None:
+                by_shard.setdefault(shard, []).append(t.address)
+        due = {a for addresses in by_shard.values() for a in addresses}
+        if not due:
+            fut.set_result(None)
+            return fut
+        with self._lock:
+            self.waiting.append((fut, due))
+        for shard, addresses in by_shard.items():
+            self.inboxes[shard].put(("refresh", addresses))
+        return fut
+
+    def _reported(self, address: str):
+        with self._lock:
+            for fut, due in self.waiting:
+                due.discard(address)
+            done = [fut for fut, due in self.waiting if not due]
+            self.waiting = [(fut, due) for fut, due in self.waiting if due]
+        for fut in done:
+            fut.set_result(None)
+
+    def _drain(self):
+        while True:
+            try:
+                kind, address, events, positions, watermark = self.outbox.get()
+            except Exception as e:
+                print(f"shard queue error: {e}")
+                time.sleep(1)
+                continue
+            trader = self.traders.get(address)
+            if kind != "events" or trader is None:
+                continue
+            try:
+                trader.positions = {c: position_from_json(p) for c, p in positions.items()}
+                trader.updated_at = time.time()
+                if watermark is not None:
+                    self.watermarks.restore(address, *watermark)
+                self.api.positions_changed(trader)
+                self._reported(address)
+                self.received += 1
+                if events:
+                    self.monitor.push_event(trader, events)
+            except Exception as e:
+                print(f"shard result error {address}: {e}")
@@ -0,0 +1,206 @@
+# -----------------------------
+# Persistent State Store (SQLite)
+# -----------------------------
+from models import Trader, Position, Order, intern_coin
+from watermarks import FillWatermarks
+from subscriptions import Subscription
+from dataclasses import asdict
+from typing import List, Dict, Tuple, Optional
+import json
+import sqlite3
+import threading
+import time
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS traders (
+    address TEXT PRIMARY KEY,
+    rank    INTEGER,
+    name    TEXT,
+    pnl     REAL,
+    roi     REAL,
+    volume  REAL,
+    updated_at REAL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS fill_watermarks (
+    address   TEXT PRIMARY KEY,
+    last_time INTEGER,
+    tids      TEXT
+);
+CREATE TABLE IF NOT EXISTS positions (
+    address TEXT,
+    coin    TEXT,
+    data    TEXT,
+    PRIMARY KEY (address, coin)
+);
+CREATE TABLE IF NOT EXISTS subscriptions (
+    chat_id INTEGER PRIMARY KEY,
+    data    TEXT
+);
+CREATE TABLE IF NOT EXISTS messages (
+    address    TEXT,
+    coin       TEXT,
+    message_id INTEGER,
+    PRIMARY KEY (address, coin)
+);
+"""
+
+
+def position_to_json(pos: Position) -> str:
+    return json.dumps(asdict(pos))
+
+
+def position_from_json(data: str) -> Position:
+    d = json.loads(data)
+    for key in ("tp", "sl"):
+        if d.get(key) is not None:
+            d[key] = Order(**d[key])
+    books = {}
+    for key in ("buy_order", "sell_order"):
+        orders = d.pop(key, None) or {}
+        books[key] = orders.values() if isinstance(orders, dict) else orders
+    d["market"] = tuple(Order(**o) for o in d.get("market", []))
+    pos = Position(**d)
+    # empty books stay the shared sentinel
+    for key, orders in books.items():
+        for o in orders:
+            pos.upsert_order(Order(**dict(o, side="B" if key == "buy_order" else "A")))
+    return pos
+
+
+class StateStore:
+    """
+    Everything a restart needs to resume without reloading: the tracked trader
+    set (tagged with the filters that produced it), fill watermarks, position
+    snapshots and the (trader, coin) -> message_id map used for reply threading.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript(SCHEMA)
+        columns = {row[1] for row in self.db.execute("PRAGMA table_info(traders)")}
+        if "updated_at" not in columns:
+            # databases written before traders.updated_at existed
+            self.db.execute("ALTER TABLE traders ADD COLUMN updated_at REAL DEFAULT 0")
+        self.db.commit()
+
+    # --------------------------
+    # meta
+    # --------------------------
+    def get_meta(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self.db.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def set_meta(self, key: str, value: str):
+        with self._lock, self.db:
+            self.db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+    # --------------------------
+    # traders
+    # --------------------------
+    def save_traders(self, traders: List[Trader], filters: str):
+        """Replace the tracked set; state of traders that left the set is dropped."""
+        with self._lock, self.db:
+            self.db.execute("DELETE FROM traders")
+            self.db.executemany(
+                "INSERT INTO traders (address, rank, name, pnl, roi, volume, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [(t.address, i, t.name, t.pnl, t.roi, t.volume, t.updated_at) for i, t in enumerate(traders)]
+            )
+            for table in ("fill_watermarks", "positions", "messages"):
+                self.db.execute(f"DELETE FROM {table} WHERE address NOT IN (SELECT address FROM traders)")
+            self.db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('filters', ?)", (filters,))
+
+    def load_traders(self, filters: str) -> List[Trader]:
+        """Saved traders with their positions, or [] when they were picked with other filters."""
+        if self.get_meta("filters") != filters:
+            return []
+        saved_at = float(self.get_meta("saved_at") or 0)  # for rows saved before updated_at was kept
+        with self._lock:
+            rows = self.db.execute("SELECT address, name, pnl, roi, volume, updated_at FROM traders ORDER BY rank").fetchall()
+            pos_rows = self.db.execute("SELECT address, coin, data FROM positions").fetchall()
+
+        # updated_at keeps the age of the restored snapshot honest (/status, snapshot notes, checkpoints)
+        traders = {a: Trader(name=n, address=a, pnl=p, positions={}, roi=r, volume=v, updated_at=u or saved_at)
+                   for a, n, p, r, v, u in rows}
+        for address, coin, data in pos_rows:
+            if address in traders:
+                try:
+                    traders[address].positions[intern_coin(coin)] = position_from_json(data)
+                except (TypeError, ValueError) as e:
+                    print(f"Stored position {address} {coin} unreadable: {e}")
+        return list(traders.values())
+
+    # --------------------------
+    # positions + watermarks
+    # --------------------------
+    def save_state(self, traders: List[Trader], watermarks: FillWatermarks):
+        """Snapshot positions and fill watermarks of the given traders in one transaction."""
+        with self._lock, self.db:
+            for t in traders:
+                self.db.execute("DELETE FROM positions WHERE address = ?", (t.address,))
+                self.db.execute("UPDATE traders SET updated_at = ? WHERE address = ?", (t.updated_at, t.address))
+                self.db.executemany(
+                    "INSERT INTO positions (address, coin, data) VALUES (?, ?, ?)",
+                    [(t.address, coin, position_to_json(pos)) for coin, pos in list(t.positions.items())]
+                )
+                if t.address in watermarks:
+                    last_time, tids = watermarks.export(t.address)
+                    self.db.execute(
+                        "INSERT OR REPLACE INTO fill_watermarks (address, last_time, tids) VALUES (?, ?, ?)",
+                        (t.address, last_time, json.dumps(tids))
+                    )
+            self.db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('saved_at', ?)", (str(time.time()),))
+
+    def load_watermarks(self, watermarks: FillWatermarks):
+        with self._lock:
+            rows = self.db.execute("SELECT address, last_time, tids FROM fill_watermarks").fetchall()
+        for address, last_time, tids in rows:
+            watermarks.restore(address, last_time, json.loads(tids or "[]"))
+
+    # --------------------------
+    # message threading
+    # --------------------------
+    def save_message(self, address: str, coin: str, message_id: int):
+        with self._lock, self.db:
+            self.db.execute(
+                "INSERT OR REPLACE INTO messages (address, coin, message_id) VALUES (?, ?, ?)",
+                (address, coin, message_id)
+            )
+
+    def load_messages(self) -> Dict[Tuple[str, str], int]:
+        with self._lock:
+            rows = self.db.execute("SELECT address, coin, message_id FROM messages").fetchall()
+        return {(a, c): m for a, c, m in rows}
+
+    # --------------------------
+    # per-chat subscriptions
+    # --------------------------
+    def save_subscription(self, sub: Subscription):
+        with self._lock, self.db:
+            self.db.execute(
+                "INSERT OR REPLACE INTO subscriptions (chat_id, data) VALUES (?, ?)",
+                (sub.chat_id, sub.to_json())
+            )
+
+    def delete_subscription(self, chat_id: int):
+        with self._lock, self.db:
+            self.db.execute("DELETE FROM subscriptions WHERE chat_id = ?", (chat_id,))
+
+    def load_subscriptions(self) -> List[Subscription]:
+        with self._lock:
+            rows = self.db.execute("SELECT chat_id, data FROM subscriptions").fetchall()
+        subs = []
+        for chat_id, data in rows:
+            try:
+                subs.append(Subscription.from_json(data))
+            except (TypeError, ValueError) as e:
+                print(f"Stored subscription {chat_id} unreadable: {e}")
+        return subs
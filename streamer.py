@@ -0,0 +1,201 @@
+# -----------------------------
+# WebSocket Streaming (userFills / orderUpdates)
+# -----------------------------
+from models import Trader, FillEvent
+from watermarks import FillWatermarks
+from typing import List, Dict, Set
+import asyncio
+import json
+import threading
+import time
+import websockets
+
+
+class FillStreamer(threading.Thread):
+    """
+    Streams fills and order updates for every tracked trader instead of polling.
+    Addresses are spread over a small pool of WebSocket connections
+    (WS_USERS_PER_CONNECTION each). Every newly subscribed address, on the
+    first connect as well as after a reconnect, is backfilled through
+    position_fills from its watermark; tid dedup makes the overlap harmless.
+    """
+    PING_EVERY = 50  # server drops connections idle for 60s
+
+    def __init__(self, api, config, monitor, watermarks: FillWatermarks):
+        self.api = api
+        self.cfg = config
+        self.monitor = monitor
+        self.watermarks = watermarks
+        self.traders: Dict[str, Trader] = {}
+        self.shards: List[List[str]] = []
+        self.oid_owner: Dict[int, str] = {}
+        self.trader_oids: Dict[str, Set[int]] = {}  # address -> oids it owns in oid_owner
+        self.refreshing: Set[str] = set()
+        self.stale: Set[str] = set()  # updated again while a reload was running
+        self._lock = threading.Lock()
+        self.loop = None
+        super().__init__(daemon=True)
+
+    # --------------------------
+    # Trader set
+    # --------------------------
+    def set_traders(self, traders: List[Trader]):
+        with self._lock:
+            self.traders = {t.address: t for t in traders}
+            addrs = sorted(self.traders)
+            per_conn = max(1, self.cfg.ws_users_per_connection)
+            self.shards = [addrs[i:i + per_conn] for i in range(0, len(addrs), per_conn)]
+            for address in [a for a in self.trader_oids if a not in self.traders]:
+                for oid in self.trader_oids.pop(address):
+                    self.oid_owner.pop(oid, None)
+        for t in traders:
+            self.register_orders(t)
+
+    def register_orders(self, trader: Trader):
+        """
+        Remember which trader owns each resting oid; orderUpdates carry no user
+        field. Oids no longer resting for this trader are forgotten.
+        """
+        oids = set()
+        for pos in list(trader.positions.values()):
+            oids.update(pos.buy_order)
+            oids.update(pos.sell_order)
+        with self._lock:
+            for oid in self.trader_oids.get(trader.address, set()) - oids:
+                self.oid_owner.pop(oid, None)
+            for oid in oids:
+                self.oid_owner[oid] = trader.address
+            self.trader_oids[trader.address] = oids
+
+    # --------------------------
+    # Thread / loop
+    # --------------------------
+    def run(self):
+        self.loop = asyncio.new_event_loop()
+        self.loop.run_until_complete(self._main())
+
+    async def _main(self):
+        running = {}
+        while True:
+            # one task per shard; extra tasks appear when the trader set grows
+            for idx in range(len(self.shards)):
+                task = running.get(idx)
+                if task is None or task.done():
+                    running[idx] = asyncio.ensure_future(self._connection(idx))
+            await asyncio.sleep(1)
+
+    async def _connection(self, idx: int):
+        while idx < len(self.shards):
+            try:
+                async with websockets.connect(self.cfg.ws_url, ping_interval=None, max_size=None) as ws:
+                    subscribed: Set[str] = set()
+                    added = await self._sync_subscriptions(ws, idx, subscribed)
+                    # fills since the watermark (startup, downtime or the reconnect gap)
+                    print(f"ws[{idx}] connected, backfilling {len(added)} traders")
+                    self._backfill(added)
+
+                    last_ping = time.time()
+                    while idx < len(self.shards):
+                        try:
+                            raw = await asyncio.wait_for(ws.recv(), timeout=1)
+                            self._handle(raw, idx)
+                        except asyncio.TimeoutError:
+                            pass
+                        if time.time() - last_ping > self.PING_EVERY:
+                            await ws.send(json.dumps({"method": "ping"}))
+                            last_ping = time.time()
+                        self._backfill(await self._sync_subscriptions(ws, idx, subscribed))
+                    return
+            except Exception as e:
+                print(f"ws[{idx}] error: {e}, reconnecting")
+                await asyncio.sleep(self.cfg.ws_reconnect_delay)
+
+    async def _sync_subscriptions(self, ws, idx: int, subscribed: Set[str]) -> Set[str]:
+        """Bring the connection's subscriptions in line with its shard; returns the newly added addresses."""
+        with self._lock:
+            wanted = set(self.shards[idx]) if idx < len(self.shards) else set()
+        for method, users in (("subscribe", wanted - subscribed), ("unsubscribe", subscribed - wanted)):
+            for user in users:
+                for channel in ("userFills", "orderUpdates"):
+                    await ws.send(json.dumps({
+                        "method": method,
+                        "subscription": {"type": channel, "user": user}
+                    }))
+        added = wanted - subscribed
+        subscribed.clear()
+        subscribed.update(wanted)
+        return added
+
+    # --------------------------
+    # Messages
+    # --------------------------
+    def _handle(self, raw, idx: int):
+        try:
+            msg = json.loads(raw)
+        except ValueError:
+            return
+        channel = msg.get("channel")
+        data = msg.get("data")
+        if channel == "userFills":
+            # the initial snapshot is history; gaps are covered by _backfill instead
+            if data.get("isSnapshot"):
+                return
+            trader = self.traders.get(data.get("user", ""))
+            if trader is not None:
+                fills = data.get("fills", [])
+                self._deliver(trader, self.api.parse_fills(trader, fills), self.api.page_time(fills))
+        elif channel == "orderUpdates":
+            owners = {self.oid_owner.get(u.get("order", {}).get("oid")) for u in data or []}
+            if None in owners:
+                # a new order: only the traders of this connection can own it
+                owners.discard(None)
+                with self._lock:
+                    owners.update(self.shards[idx] if idx < len(self.shards) else ())
+            for address in owners:
+                trader = self.traders.get(address)
+                if trader is not None:
+                    self._schedule_refresh(trader)
+
+    def _deliver(self, trader: Trader, events: List[FillEvent], last_time: int = 0):
+        fresh = self.watermarks.accept(trader.address, events)
+        # spot fills never become events, but a backfill must not fetch them again
+        self.watermarks.advance(trader.address, last_time)
+        if not fresh:
+            return
+        self.api.apply_fills(trader, fresh)
+        self.monitor.push_event(trader, fresh)
+        self._schedule_refresh(trader)
+
+    def _schedule_refresh(self, trader: Trader):
+        # a burst of updates for one trader needs a single reload (plus one more if it lands mid-reload)
+        if trader.address in self.refreshing:
+            self.stale.add(trader.address)
+            return
+        self.refreshing.add(trader.address)
+        self.loop.run_in_executor(None, self._refresh, trader)
+
+    def _refresh(self, trader: Trader):
+        try:
+            while True:
+                self.stale.discard(trader.address)
+                # fills are folded on arrival; clearinghouseState only when a checkpoint is due
+                if self.api.checkpoint_due(trader):
+                    self.api.position_update(trader)
+                self.api.load_limit_orders(trader)
+                self.register_orders(trader)
+                if trader.address not in self.stale:
+                    break
+        finally:
+            self.refreshing.discard(trader.address)
+
+    def _backfill(self, addresses):
+        for address in addresses:
+            trader = self.traders.get(address)
+            if trader is None:
+                continue
+            self.loop.run_in_executor(None, self._backfill_one, trader)
+
+    def _backfill_one(self, trader: Trader):
+        events, last_time = self.api.position_fills(trader, self.watermarks.since(trader.address))
+        if events or last_time:
+            self.loop.call_soon_threadsafe(self._deliver, trader, events, last_time)
@@ -0,0 +1,146 @@
+# -----------------------------
+# Per-chat Subscriptions
+# -----------------------------
+from models import Trader, FillEvent, intern_coin
+from dataclasses import dataclass, field, asdict
+from typing import Dict, FrozenSet, Iterable, List, Optional, Set
+import json
+import math
+import threading
+
+
+@dataclass(slots=True)
+class Subscription:
+    chat_id: int
+    coins: FrozenSet[str] = field(default_factory=frozenset)    # empty = every coin
+    wallets: FrozenSet[str] = field(default_factory=frozenset)  # empty = every tracked trader
+    min_notional: float = 0.0
+    direction: str = ""                                          # "long", "short" or "" for both
+    min_pnl: Optional[float] = None
+    min_roi: Optional[float] = None
+
+    def to_json(self) -> str:
+        d = asdict(self)
+        d["coins"] = sorted(self.coins)
+        d["wallets"] = sorted(self.wallets)
+        return json.dumps(d)
+
+    @classmethod
+    def from_json(cls, data: str) -> "Subscription":
+        d = json.loads(data)
+        d["coins"] = frozenset(intern_coin(c) for c in d.get("coins", []))
+        d["wallets"] = frozenset(w.lower() for w in d.get("wallets", []))
+        return cls(**d)
+
+    def describe(self) -> str:
+        parts = [
+            "coins: " + (", ".join(sorted(self.coins)) if self.coins else "all"),
+            "wallets: " + (", ".join(w[:6] + "..." + w[-4:] for w in sorted(self.wallets)) if self.wallets else "all"),
+            f"min notional: ${self.min_notional:,.0f}",
+            "direction: " + (self.direction or "both"),
+        ]
+        if self.min_pnl is not None:
+            parts.append(f"trader PnL ≥ ${self.min_pnl:,.0f}")
+        if self.min_roi is not None:
+            parts.append(f"trader ROI ≥ {self.min_roi:.1f}%")
+        return "\n".join(parts)
+
+
+def fill_side(ev: FillEvent) -> str:
+    """'long' or 'short' for the position the fill leaves; flips read 'Long > Short'."""
+    direction = ev.direction.split(">")[-1]
+    if "Long" in direction:
+        return "long"
+    if "Short" in direction:
+        return "short"
+    return ""
+
+
+def notional_bucket(notional: float) -> int:
+    # decades: <$10 -> 0, $10..100 -> 1, $100..1k -> 2, ...
+    return 0 if notional < 10 else int(math.log10(notional))
+
+
+class SubscriptionIndex:
+    """
+    Subscriptions indexed by coin, by wallet and by min-notional decade.
+    Routing a fill starts from the smallest of the three candidate sets
+    (coin, wallet, notional) and checks the remaining predicates on those
+    only, so the cost follows the number of plausible subscribers rather
+    than the total.
+    """
+    def __init__(self):
+        self.subs: Dict[int, Subscription] = {}
+        self.by_coin: Dict[str, Set[int]] = {}
+        self.any_coin: Set[int] = set()
+        self.by_wallet: Dict[str, Set[int]] = {}
+        self.any_wallet: Set[int] = set()
+        self.by_bucket: Dict[int, Set[int]] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.subs)
+
+    def get(self, chat_id: int) -> Optional[Subscription]:
+        return self.subs.get(chat_id)
+
+    def _keys(self, sub: Subscription):
+        coin_sets = [self.by_coin.setdefault(c, set()) for c in sub.coins] or [self.any_coin]
+        wallet_sets = [self.by_wallet.setdefault(w, set()) for w in sub.wallets] or [self.any_wallet]
+        bucket = self.by_bucket.setdefault(notional_bucket(sub.min_notional) if sub.min_notional else 0, set())
+        return coin_sets + wallet_sets + [bucket]
+
+    def put(self, sub: Subscription):
+        with self._lock:
+            self._remove(sub.chat_id)
+            self.subs[sub.chat_id] = sub
+            for s in self._keys(sub):
+                s.add(sub.chat_id)
+
+    def remove(self, chat_id: int):
+        with self._lock:
+            self._remove(chat_id)
+
+    def _remove(self, chat_id: int):
+        old = self.subs.pop(chat_id, None)
+        if old is None:
+            return
+        for s in self._keys(old):
+            s.discard(chat_id)
+
+    def load(self, subs: Iterable[Subscription]):
+        for sub in subs:
+            self.put(sub)
+
+    def match(self, trader: Trader, ev: FillEvent) -> List[int]:
+        """Chats whose filters accept this (digest) fill of this trader."""
+        notional = ev.size * ev.price
+        side = fill_side(ev)
+        wallet = (trader.address or "").lower()
+        with self._lock:
+            if not self.subs:
+                return []
+            coin_cands = (self.by_coin.get(ev.coin, set()), self.any_coin)
+            wallet_cands = (self.by_wallet.get(wallet, set()), self.any_wallet)
+            top = notional_bucket(notional)
+            notional_cands = tuple(s for b, s in self.by_bucket.items() if b <= top)
+            smallest = min((coin_cands, wallet_cands, notional_cands), key=lambda sets: sum(len(s) for s in sets))
+
+            out = []
+            for sets in smallest:
+                for chat_id in sets:
+                    sub = self.subs[chat_id]
+                    if sub.coins and ev.coin not in sub.coins:
+                        continue
+                    if sub.wallets and wallet not in sub.wallets:
+                        continue
+                    if notional < sub.min_notional:
+                        continue
+                    if sub.direction and sub.direction != side:
+                        continue
+                    if sub.min_pnl is not None and (trader.pnl or 0) < sub.min_pnl:
+                        continue
+                    if sub.min_roi is not None and (trader.roi or 0) < sub.min_roi:
+                        continue
+                    out.append(chat_id)
+            return out
@@ -0,0 +1,73 @@
+# -----------------------------
+# Shared HTTP Transport
+# -----------------------------
+from typing import Dict, Optional
+import httpx
+
+try:
+    import h2  # noqa: F401  (httpx needs it for http2=True)
+    HAS_H2 = True
+except ImportError:
+    HAS_H2 = False
+
+
+class HttpTransport:
+    """
+    One pooled keep-alive client per process for every Hyperliquid request,
+    so the TLS handshake is paid once per connection instead of once per call.
+    The sync client serves HyperliquidAPI, the async one serves AsyncPoller.
+    """
+    # seconds, looked up by info request type first, then by endpoint
+    DEFAULT_TIMEOUTS = {
+        "info": 10,
+        "leaderboard": 20,
+    }
+
+    def __init__(self, config):
+        self.cfg = config
+        self.http2 = bool(config.http2) and HAS_H2
+        if config.http2 and not HAS_H2:
+            print("HTTP2 requested but 'h2' is not installed, falling back to HTTP/1.1")
+
+        self.timeouts = dict(self.DEFAULT_TIMEOUTS)
+        self.timeouts.update(config.http_timeouts or {})
+
+        self.headers = {
+            'User-Agent': 'Mozilla/5.0 (compatible; Bot)',
+            'Accept-Encoding': 'gzip, deflate',
+        }
+        self.limits = httpx.Limits(
+            max_connections=config.http_pool_size,
+            max_keepalive_connections=config.http_pool_size,
+            keepalive_expiry=60,
+        )
+        self.client = httpx.Client(http2=self.http2, limits=self.limits, headers=self.headers)
+        self._async_client: Optional[httpx.AsyncClient] = None
+
+    def timeout(self, endpoint: str, kind: str = None) -> float:
+        if kind and kind in self.timeouts:
+            return self.timeouts[kind]
+        return self.timeouts.get(endpoint, 10)
+
+    @property
+    def async_client(self) -> httpx.AsyncClient:
+        # created lazily: an AsyncClient is bound to the loop it is first used on
+        if self._async_client is None:
+            self._async_client = httpx.AsyncClient(http2=self.http2, limits=self.limits, headers=self.headers)
+        return self._async_client
+
+    def post(self, url: str, payload: Dict, endpoint: str = "info") -> httpx.Response:
+        return self.client.post(url, json=payload, timeout=self.timeout(endpoint, payload.get("type")))
+
+    def get(self, url: str, endpoint: str, headers: Dict = None) -> httpx.Response:
+        return self.client.get(url, headers=headers, timeout=self.timeout(endpoint))
+
+    def stream(self, url: str, endpoint: str, headers: Dict = None):
+        """Context manager yielding an unread response, for incremental parsing."""
+        return self.client.stream("GET", url, headers=headers, timeout=self.timeout(endpoint))
+
+    async def apost(self, url: str, payload: Dict, endpoint: str = "info") -> httpx.Response:
+        return await self.async_client.post(url, json=payload, timeout=self.timeout(endpoint, payload.get("type")))
+
+    def close(self):
+        self.client.close()
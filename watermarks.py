@@ -0,0 +1,85 @@
+# -----------------------------
+# Fill Watermarks & tid de-duplication
+# -----------------------------
+from models import FillEvent
+from typing import Dict, List, Iterable, Tuple
+from collections import deque
+import threading
+import time
+
+
+class FillWatermarks:
+    """
+    Per-trader ingestion cursor. Requests start at the time of the last seen
+    fill (inclusive, so fills sharing that millisecond are not lost) and the
+    overlap is removed with a bounded set of recently seen tids. Every fill is
+    therefore accepted exactly once, whatever the local clock says.
+    """
+    def __init__(self, max_tids: int = 512):
+        self.max_tids = max_tids
+        self.last_time: Dict[str, int] = {}
+        self._tids: Dict[str, set] = {}
+        self._order: Dict[str, deque] = {}
+        self._lock = threading.Lock()
+
+    def __contains__(self, address: str) -> bool:
+        return address in self.last_time
+
+    def start(self, address: str, since_ms: int = None):
+        """Begin tracking address; fills before since_ms (default: now) are ignored."""
+        with self._lock:
+            if address in self.last_time:
+                return
+            self.last_time[address] = int(time.time() * 1000) if since_ms is None else int(since_ms)
+            self._tids[address] = set()
+            self._order[address] = deque()
+
+    def retain(self, addresses: Iterable[str]):
+        keep = set(addresses)
+        with self._lock:
+            for address in list(self.last_time):
+                if address not in keep:
+                    del self.last_time[address]
+                    del self._tids[address]
+                    del self._order[address]
+
+    def since(self, address: str) -> int:
+        """startTime (ms) for the next userFillsByTime request."""
+        return self.last_time.get(address, int(time.time() * 1000))
+
+    def accept(self, address: str, events: List[FillEvent]) -> List[FillEvent]:
+        """Drop fills already seen, advance the watermark, return the new ones in time order."""
+        self.start(address, 0)
+        fresh = []
+        with self._lock:
+            tids = self._tids[address]
+            order = self._order[address]
+            for ev in sorted(events, key=lambda e: e.time):
+                if ev.tid in tids:
+                    continue
+                tids.add(ev.tid)
+                order.append(ev.tid)
+                if len(order) > self.max_tids:
+                    tids.discard(order.popleft())
+                self.last_time[address] = max(self.last_time[address], ev.time)
+                fresh.append(ev)
+        return fresh
+
+    def advance(self, address: str, time_ms: int):
+        """
+        Move the watermark up to time_ms without accepting anything: pages of
+        fills that parse_fills drops (spot) are not requested again.
+        """
+        with self._lock:
+            if address in self.last_time and time_ms > self.last_time[address]:
+                self.last_time[address] = int(time_ms)
+
+    def export(self, address: str) -> Tuple[int, List[int]]:
+        with self._lock:
+            return self.last_time[address], list(self._order[address])
+
+    def restore(self, address: str, last_time: int, tids: List[int]):
+        with self._lock:
+            self.last_time[address] = int(last_time)
+            self._order[address] = deque(tids[-self.max_tids:])
+            self._tids[address] = set(self._order[address])